@@ -5,6 +5,7 @@ import os
 import json
 import traceback
 from . import DeadlineSend
+from .RequestCache import RequestCache
 
 class ConnectionProperty:
 
@@ -16,6 +17,7 @@ class ConnectionProperty:
         self.useTls = useTls
         self.caCert = caCert
         self.insecure = insecure
+        self.requestCache = RequestCache()
         
     def GetAddress(self):
         return self.address
@@ -36,18 +38,30 @@ class ConnectionProperty:
     def EnableAuthentication(self, enable):
         self.useAuth = enable
         
-    def __get__(self, commandString):
+    def ConfigureRequestCache(self, ttl, maxsize):
+        """ Sets the GET response cache lifetime (seconds, 0 disables caching) and size. """
+        self.requestCache.ttl = ttl
+        self.requestCache.maxsize = maxsize
+        self.requestCache.Clear()
         
-        return DeadlineSend.send(self.address,commandString, "GET", None, self.useAuth, self.user, self.password, self.useTls, self.caCert, self.insecure)
+    def GetRequestCacheStatistics(self):
+        return self.requestCache.GetStatistics()
+        
+    def __get__(self, commandString, decoder=None):
+        
+        return self.requestCache.Get(commandString, lambda: DeadlineSend.send(self.address,commandString, "GET", None, self.useAuth, self.user, self.password, self.useTls, self.caCert, self.insecure, decoder), decoder)
         
     def __put__(self, commandString, body):
         
+        self.requestCache.Invalidate(commandString)
         return DeadlineSend.send(self.address, commandString, "PUT", body, self.useAuth, self.user, self.password, self.useTls, self.caCert, self.insecure)
         
     def __delete__(self, commandString):
         
+        self.requestCache.Invalidate(commandString)
         return DeadlineSend.send(self.address,commandString, "DELETE", None, self.useAuth, self.user, self.password, self.useTls, self.caCert, self.insecure)
         
     def __post__(self, commandString, body):
         
+        self.requestCache.Invalidate(commandString)
         return DeadlineSend.send(self.address, commandString, "POST", body, self.useAuth, self.user, self.password, self.useTls, self.caCert, self.insecure)
@@ -24,13 +24,49 @@ from .ConnectionProperty import ConnectionProperty
 
 #http://docs.python.org/2/library/httplib.html
 
-class DeadlineCon:
+class _LazyRequestGroup(object):
+    """
+        Class attribute that builds a request group (Jobs, Pools, ...) for a
+        DeadlineCon the first time it is accessed and then caches it on the instance.
+    """
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        group = self.factory(instance.connectionProperties)
+        setattr(instance, self.name, group)
+        return group
+
+
+class DeadlineCon(object):
     """
         Object used by user to communicate with the web service.
         Host name of the Web Service, as well as the port number the
         Web Service is listening on are required for construction.
         Call other API functions through this object.
     """
+    #The different request groups use the ConnectionProperty object to send their requests.
+    #They are only built when first used.
+    Jobs = _LazyRequestGroup("Jobs", Jobs.Jobs)
+    SlavesRenderingJob = _LazyRequestGroup("SlavesRenderingJob", SlavesRenderingJob.SlavesRenderingJob)
+    Tasks = _LazyRequestGroup("Tasks", Tasks.Tasks)
+    TaskReports = _LazyRequestGroup("TaskReports", TaskReports.TaskReports)
+    JobReports = _LazyRequestGroup("JobReports", JobReports.JobReports)
+    LimitGroups = _LazyRequestGroup("LimitGroups", Limits.LimitGroups)
+    Pulse = _LazyRequestGroup("Pulse", Pulse.Pulse)
+    Repository = _LazyRequestGroup("Repository", Repository.Repository)
+    MappedPaths = _LazyRequestGroup("MappedPaths", MappedPaths.MappedPaths)
+    MaximumPriority = _LazyRequestGroup("MaximumPriority", MaximumPriority.MaximumPriority)
+    Pools = _LazyRequestGroup("Pools", Pools.Pools)
+    Groups = _LazyRequestGroup("Groups", Groups.Groups)
+    Plugins = _LazyRequestGroup("Plugins", Plugins.Plugins)
+    Slaves = _LazyRequestGroup("Slaves", Slaves.Slaves)
+    Users = _LazyRequestGroup("Users", Users.Users)
+    Balancer = _LazyRequestGroup("Balancer", Balancer.Balancer)
+
     def __init__(self, host, port, useTls=False, caCert=None, insecure=False):
         """ Constructs an instance of DeadlineCon.
             Params: host name of the Web Service (string).
@@ -44,24 +80,6 @@ class DeadlineCon:
         address = host+":"+str(port)
         self.connectionProperties = ConnectionProperty(address, False, useTls, caCert, insecure)
         
-        #The different request groups use the ConnectionProperty object to send their requests.
-        self.Jobs = Jobs.Jobs(self.connectionProperties)
-        self.SlavesRenderingJob = SlavesRenderingJob.SlavesRenderingJob(self.connectionProperties)
-        self.Tasks = Tasks.Tasks(self.connectionProperties)
-        self.TaskReports = TaskReports.TaskReports(self.connectionProperties)
-        self.JobReports = JobReports.JobReports(self.connectionProperties)
-        self.LimitGroups = Limits.LimitGroups(self.connectionProperties)
-        self.Pulse = Pulse.Pulse(self.connectionProperties)
-        self.Repository = Repository.Repository(self.connectionProperties)
-        self.MappedPaths = MappedPaths.MappedPaths(self.connectionProperties)
-        self.MaximumPriority = MaximumPriority.MaximumPriority(self.connectionProperties)
-        self.Pools = Pools.Pools(self.connectionProperties)
-        self.Groups = Groups.Groups(self.connectionProperties)
-        self.Plugins = Plugins.Plugins(self.connectionProperties)
-        self.Slaves = Slaves.Slaves(self.connectionProperties)
-        self.Users = Users.Users(self.connectionProperties)
-        self.Balancer = Balancer.Balancer(self.connectionProperties)
-        
     def EnableAuthentication(self, enable=True):
         """
             Toggles authentication mode. If enabled, requests sent through this DeadlineCon object will attempt authentication with the current user name and password credentials.
@@ -84,4 +102,11 @@ class DeadlineCon:
         """
             Returns whether authentication mode is enabled for this DeadlineCon or not. If not, then authentication will fail if the Web Service requires authentication.
         """
-        return self.connectionProperties.AuthenticationEnabled()
\ No newline at end of file
+        return self.connectionProperties.AuthenticationEnabled()
+        
+    def GetRequestCacheStatistics(self):
+        """
+            Returns the counters of the GET request cache: hits, misses, coalesced (requests merged into an
+            identical in-flight request), saved_requests, hit_ratio and entries.
+        """
+        return self.connectionProperties.GetRequestCacheStatistics()
\ No newline at end of file
@@ -1,28 +1,186 @@
 from __future__ import absolute_import
 import base64
 import json
+import socket
 import ssl
+import threading
+import time
 import traceback
+import zlib
 
 try:
     # python3
-    from urllib.request import urlopen, Request  # type: ignore
     from urllib.error import HTTPError  # type: ignore
+    from urllib.parse import urlsplit  # type: ignore
+    from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected  # type: ignore
+    # Errors that mean a reused keep-alive connection was closed by the server.
+    _STALE_CONNECTION_ERRORS = (RemoteDisconnected, BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
 except ImportError:
     # python2
-    from urllib2 import urlopen, Request, HTTPError  # type: ignore
+    from urllib2 import HTTPError  # type: ignore
+    from urlparse import urlsplit  # type: ignore
+    from httplib import HTTPConnection, HTTPSConnection, BadStatusLine  # type: ignore
+    _STALE_CONNECTION_ERRORS = (BadStatusLine, socket.error)
 
 ssl.match_hostname = lambda cert, hostname: True  # type: ignore
 
+# Connections open at once (idle or in use) per (scheme, host, port, caCert, insecure).
+POOL_MAXSIZE = 8
+# Seconds a request waits for a connection while POOL_MAXSIZE are in use.
+POOL_WAIT_TIMEOUT = 60.0
+# Requests resent on another connection when a reused one turns out to be closed.
+# Others (POST, PUT) always get a new connection and are never resent.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "DELETE")
+# Idle connections older than this (seconds) are closed instead of reused.
+POOL_IDLE_TIMEOUT = 30.0
+# Socket timeout (seconds) for pooled connections.
+CONNECTION_TIMEOUT = 60.0
+
+_requestHooks = []
+
+def addRequestHook(hook):
+    """ Registers hook(requestType, path, status, seconds), called after every request.
+        path excludes the query string; status is None if no response was received.
+    """
+    _requestHooks.append(hook)
+
+def _runRequestHooks(requestType, path, status, seconds):
+    for hook in _requestHooks:
+        try:
+            hook(requestType, path, status, seconds)
+        except Exception:
+            traceback.print_exc()
+
+
+class PoolTimeoutError(Exception):
+    """ Raised when no connection became free within the pool's wait timeout. """
+
+
+class ConnectionPool:
+    """
+        Thread-safe pool of persistent HTTP/1.1 connections to one Web Service.
+        At most maxsize connections are open at once; further requests wait
+        up to waitTimeout for one to be released. Idle connections are reused
+        LIFO and closed after POOL_IDLE_TIMEOUT.
+    """
+    def __init__(self, scheme, host, port, context=None, maxsize=POOL_MAXSIZE, idleTimeout=POOL_IDLE_TIMEOUT,
+                 waitTimeout=POOL_WAIT_TIMEOUT):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.context = context
+        self.maxsize = maxsize
+        self.idleTimeout = idleTimeout
+        self.waitTimeout = waitTimeout
+        self._idle = []  # (connection, last used), oldest first
+        self._open = 0   # idle plus in use
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def acquire(self, reuse=True):
+        """ Returns (connection, reused). With reuse=False a new connection is always opened. """
+        deadline = time.time() + self.waitTimeout
+        closing = []
+        try:
+            with self._available:
+                while True:
+                    now = time.time()
+                    while self._idle and now - self._idle[0][1] >= self.idleTimeout:
+                        closing.append(self._idle.pop(0)[0])
+                        self._open -= 1
+                    if reuse and self._idle:
+                        return self._idle.pop()[0], True
+                    if self._open >= self.maxsize and self._idle:
+                        # Make room for the new connection.
+                        closing.append(self._idle.pop(0)[0])
+                        self._open -= 1
+                    if self._open < self.maxsize:
+                        self._open += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeoutError("No connection to %s:%s became free within %.0fs"
+                                               % (self.host, self.port, self.waitTimeout))
+                    self._available.wait(remaining)
+        finally:
+            for conn in closing:
+                conn.close()
+        return self._newConnection(), False
+
+    def release(self, conn):
+        """ Returns a healthy connection for reuse. """
+        with self._available:
+            self._idle.append((conn, time.time()))
+            self._available.notify()
+
+    def discard(self, conn):
+        """ Closes a connection that must not be reused. """
+        conn.close()
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def clear(self):
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._available.notify_all()
+        for conn, lastUsed in idle:
+            conn.close()
+
+    def _newConnection(self):
+        if self.scheme == "https":
+            return HTTPSConnection(self.host, self.port, timeout=CONNECTION_TIMEOUT, context=self.context)
+        return HTTPConnection(self.host, self.port, timeout=CONNECTION_TIMEOUT)
+
+
+_pools = {}
+_sslContexts = {}
+_poolsLock = threading.Lock()
+
+
+def getSslContext(caCert=None, insecure=False):
+    """ Returns a shared SSL context for the given verification settings. """
+    key = (caCert, insecure)
+    with _poolsLock:
+        context = _sslContexts.get(key)
+        if context is None:
+            context = ssl.create_default_context(cafile=caCert)
+            context.check_hostname = not insecure
+            context.verify_mode = ssl.CERT_NONE if insecure else ssl.CERT_REQUIRED
+            _sslContexts[key] = context
+        return context
+
+
+def getConnectionPool(scheme, host, port, caCert=None, insecure=False):
+    """ Returns the shared ConnectionPool for a Web Service address. """
+    key = (scheme, host, port, caCert, insecure)
+    context = getSslContext(caCert, insecure) if scheme == "https" else None
+    with _poolsLock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(scheme, host, port, context)
+            _pools[key] = pool
+        return pool
+
+
+def closeConnectionPools():
+    """ Closes every pooled connection. """
+    with _poolsLock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.clear()
+
 
 def send(address, message, requestType, body=None, useAuth=False, username="", password="", useTls=True, caCert=None,
-         insecure=False):
+         insecure=False, decoder=None):
     """
         Used for sending requests that require a message body, like PUT and POST.
         Params: address of the webservice (string).
                 message to the webservice (string).
                 request type for the message (string, PUT or POST).
                 message body for the request (string, JSON object).
+                decoder used instead of json.loads for the response text (optional, callable).
     """
     try:
         httpString = "https://" if useTls else "http://"
@@ -30,32 +188,42 @@ def send(address, message, requestType, body=None, useAuth=False, username="", p
             address = httpString + address
         url = address + message
 
-        if body is not None:
-            request = Request(url, data=body.encode('utf-8'))
-            request.add_header('Content-Type', 'application/json; charset=utf-8')
-        else:
-            request = Request(url)
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
 
-        request.get_method = lambda: requestType
+        headers = {"Connection": "keep-alive", "Accept-Encoding": "gzip"}
+        payload = None
+        if body is not None:
+            payload = body.encode('utf-8')
+            headers['Content-Type'] = 'application/json; charset=utf-8'
 
         if useAuth:
             userPassword = '%s:%s' % (username, password)
             userPasswordEncoded = base64.b64encode(userPassword.encode('utf-8')).decode()
-            request.add_header('Authorization', 'Basic %s' % userPasswordEncoded)
+            headers['Authorization'] = 'Basic %s' % userPasswordEncoded
 
-        context = None
-        if useTls:
-            context = ssl.create_default_context(cafile=caCert)
-            context.check_hostname = not insecure
-            context.verify_mode = ssl.CERT_NONE if insecure else ssl.CERT_REQUIRED
+        pool = getConnectionPool(parts.scheme, parts.hostname, parts.port, caCert, insecure)
+        status = None
+        start = time.time()
+        try:
+            status, reason, responseHeaders, data = _request(pool, requestType, path, payload, headers)
+        finally:
+            if _requestHooks:
+                _runRequestHooks(requestType, parts.path or "/", status, time.time() - start)
 
-        response = urlopen(request, context=context)
+        if status >= 400:
+            raise HTTPError(url, status, reason, responseHeaders, None)
 
-        data = response.read().decode()
+        if responseHeaders.get("Content-Encoding", "").lower() == "gzip":
+            data = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+        data = data.decode()
         data = data.replace('\n', ' ')
 
         try:
-            data = json.loads(data)
+            data = decoder(data) if decoder else json.loads(data)
         except:
             pass
         return data
@@ -67,3 +235,33 @@ def send(address, message, requestType, body=None, useAuth=False, username="", p
             return traceback.print_exc()
     except Exception as e:
         return traceback.print_exc()
+
+
+def _request(pool, requestType, path, payload, headers):
+    """
+        Sends one request over a pooled connection. If a reused connection turns
+        out to be closed by the server, the request is retried on another one.
+        Only IDEMPOTENT_METHODS reuse connections: the server may have acted on
+        a request before closing, so anything else is sent once, on a new one.
+    """
+    idempotent = requestType.upper() in IDEMPOTENT_METHODS
+    while True:
+        conn, reused = pool.acquire(reuse=idempotent)
+        try:
+            conn.request(requestType, path, payload, headers)
+            response = conn.getresponse()
+            data = response.read()
+        except _STALE_CONNECTION_ERRORS:
+            pool.discard(conn)
+            if reused:
+                continue
+            raise
+        except Exception:
+            pool.discard(conn)
+            raise
+
+        if response.will_close:
+            pool.discard(conn)
+        else:
+            pool.release(conn)
+        return response.status, response.reason, response.msg, data
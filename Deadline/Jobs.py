@@ -46,6 +46,15 @@ class Jobs:
         """
         return self.connectionProperties.__get__("/api/jobs?States=" + ",".join(states))
 
+    def GetJobStatuses(self, ids):
+        """    Gets the compact status of the specified Jobs. Only the fields needed to follow
+            a Job's progress are kept; the rest of each Job document is dropped while decoding.
+            Input: List of Job Ids.
+            Returns: The list of JobStatus.
+        """
+        script = "/api/jobs?JobID=" + ArrayToCommaSeparatedString(ids)
+        return self.connectionProperties.__get__(script, decodeJobStatuses)
+
     def GetJob(self, id):
         """Gets a Job.
             Input: id: The Job ID (may be a list).
@@ -372,6 +381,49 @@ class Jobs:
         
         return self.connectionProperties.__put__("/api/jobs", body)
         
+class JobStatus(object):
+    """
+        Compact, read-only view of the progress fields of a Job document.
+    """
+    __slots__ = ("id", "stat", "completedChunks", "renderingChunks", "queuedChunks", "errors",
+                 "date", "completedDate", "renderTime", "completedTasks", "tasks", "failedTasks", "dependencies",
+                 "batchName")
+
+    def __init__(self, jobData):
+        props = jobData.get("Props") or {}
+        self.id = jobData.get("_id")
+        self.stat = jobData.get("Stat", 5)
+        self.completedChunks = jobData.get("CompletedChunks", 0)
+        self.renderingChunks = jobData.get("RenderingChunks", 0)
+        self.queuedChunks = jobData.get("QueuedChunks", 0)
+        self.errors = jobData.get("Errs", 0)
+        self.date = jobData.get("Date", "")
+        self.completedDate = jobData.get("DateComp", "")
+        self.renderTime = props.get("JobRenderTime", 0)
+        self.completedTasks = props.get("JobCompletedTasks", 0)
+        self.tasks = props.get("Tasks", 0)
+        self.failedTasks = props.get("JobFailedTasks", 0)
+        self.dependencies = [dep.get("JobID") for dep in (props.get("Dep") or []) if isinstance(dep, dict) and dep.get("JobID")]
+        self.batchName = props.get("Batch", "")
+
+    def __repr__(self):
+        return "JobStatus(id=%r, stat=%r, completedChunks=%r)" % (self.id, self.stat, self.completedChunks)
+
+#Keys read by JobStatus, at any nesting level. Everything else is dropped as soon as its object is decoded.
+_JOB_STATUS_KEYS = frozenset(["_id", "Stat", "CompletedChunks", "RenderingChunks", "QueuedChunks", "Errs", "Date",
+                              "DateComp", "Props", "JobRenderTime", "JobCompletedTasks", "Tasks", "JobFailedTasks",
+                              "Dep", "JobID", "Batch"])
+
+def _keepJobStatusKeys(pairs):
+    return dict((key, value) for key, value in pairs if key in _JOB_STATUS_KEYS)
+
+def decodeJobStatuses(text):
+    """ Decodes a /api/jobs response into a list of JobStatus. """
+    jobs = json.loads(text, object_pairs_hook=_keepJobStatusKeys)
+    if isinstance(jobs, dict):
+        jobs = [jobs]
+    return [JobStatus(job) for job in jobs if isinstance(job, dict)]
+
 def buildJobSubmission(info, plugins, aux, idOnly):
     
     infoText = fileRead(info)
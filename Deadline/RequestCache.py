@@ -0,0 +1,119 @@
+from __future__ import absolute_import
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a cached GET response stays valid.
+DEFAULT_TTL = 1.0
+# Maximum number of cached responses (least recently used are dropped first).
+DEFAULT_MAXSIZE = 256
+# Read endpoints whose responses may be cached. Other GETs are only coalesced.
+CACHEABLE_PREFIXES = (
+    "/api/jobs?JobID=",
+    "/api/pools",
+    "/api/groups",
+    "/api/slaves",
+)
+
+
+class _InFlight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCache(object):
+    """
+        Single-flight and short-TTL LRU cache for GET requests of one ConnectionProperty.
+        Concurrent identical GETs share one request; responses of CACHEABLE_PREFIXES
+        endpoints are reused for ttl seconds. Writes invalidate the written resource.
+    """
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE, cacheablePrefixes=CACHEABLE_PREFIXES):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cacheablePrefixes = cacheablePrefixes
+        self._entries = OrderedDict()
+        self._inFlight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def Get(self, commandString, fetch, variant=None):
+        """ Returns the response for commandString, calling fetch() only when needed.
+            variant tells apart responses of the same request decoded differently.
+        """
+        cacheable = self.ttl > 0 and commandString.startswith(self.cacheablePrefixes)
+        key = (commandString, variant)
+        with self._lock:
+            if cacheable:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.time():
+                    # Re-insert to mark as most recently used (OrderedDict.move_to_end is python3 only).
+                    self._entries[key] = self._entries.pop(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+            call = self._inFlight.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlight()
+                self._inFlight[key] = call
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fetch()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inFlight.pop(key, None)
+                if cacheable and call.error is None and _isSuccess(call.result):
+                    self._entries.pop(key, None)
+                    self._entries[key] = (time.time() + self.ttl, copy.deepcopy(call.result))
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            call.event.set()
+        return call.result
+
+    def Invalidate(self, commandString):
+        """ Drops cached responses for the resource commandString writes to (e.g. /api/jobs). """
+        resource = commandString.split("?", 1)[0]
+        with self._lock:
+            for key in list(self._entries):
+                if key[0].split("?", 1)[0] == resource:
+                    del self._entries[key]
+
+    def Clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def GetStatistics(self):
+        """ Returns the cache counters as a dictionary. """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "saved_requests": self.hits + self.coalesced,
+                "hit_ratio": float(self.hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+def _isSuccess(result):
+    # DeadlineSend.send returns None or an "Error: ..." string when a request fails.
+    if result is None:
+        return False
+    return not (isinstance(result, str) and result.startswith("Error"))
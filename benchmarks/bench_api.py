@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+API latency under concurrent load.
+
+Starts runner/run_api.py in its own process against an isolated job store
+pre-filled with --jobs jobs, then drives it from --clients keep-alive HTTP
+clients and reports p50/p99 latency and throughput for:
+    POST /job          registering new jobs
+    GET  /job/{id}     single job status
+    GET  /jobs         first page of the job list (api.jobs_page_size jobs)
+    GET  /jobs?...     dashboard query: 50 Rendering jobs, three fields each
+
+    python benchmarks/bench_api.py --jobs 1000 --clients 16 --requests 4000 -o api.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import http.client
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import ROOT, use_bench_config, summarize, emit, add_output_argument
+
+
+def prefill(count):
+    from watcher.job_store import create_job_store
+    store = create_job_store()
+    store.write_batch(puts=[{
+        "job_id": "bench%019d" % i,
+        "job_name": "NUKE_shot%03d" % (i % 1000),
+        "plugin": "Nuke",
+        "user": "bench",
+        "output_path": "/projects/show/render/shot%03d.mov" % (i % 1000),
+        "status": "Rendering",
+        "registered_at": time.time(),
+    } for i in range(count)])
+    store.close()
+    return ["bench%019d" % i for i in range(count)]
+
+
+def wait_until_ready(host, port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/job/ready-check")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("API server did not start within %.0f seconds" % timeout)
+
+
+def load(host, port, clients, total, make_request):
+    """
+    Run total requests spread over clients threads. make_request(index) returns
+    (method, path, body). Returns the endpoint summary.
+    """
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    per_client = max(1, total // clients)
+
+    def client(offset):
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        local, failed = [], 0
+        for i in range(per_client):
+            method, path, body = make_request(offset * per_client + i)
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            start = time.perf_counter()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            if response.status >= 400:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            failures[0] += failed
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(latencies)
+    summary["errors"] = failures[0]
+    summary["throughput_rps"] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+def run(args):
+    settings = use_bench_config()
+    host, port = settings["api"]["host"], settings["api"]["port"]
+    job_ids = prefill(args.jobs)
+
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "runner", "run_api.py")],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(host, port)
+        rng = random.Random(args.seed)
+
+        def register(index):
+            body = json.dumps({"job_id": "new%021d" % index, "output_path": "/tmp/out.mov",
+                               "plugin": "Nuke", "job_name": "bench_%d" % index})
+            return "POST", "/job", body
+
+        def status(index):
+            return "GET", "/job/" + rng.choice(job_ids), None
+
+        def list_all(index):
+            return "GET", "/jobs", None
+
+        def dashboard(index):
+            return "GET", "/jobs?status=Rendering&limit=50&fields=job_id,status,progress", None
+
+        return {
+            "jobs": args.jobs,
+            "post_job": load(host, port, args.clients, args.requests, register),
+            "get_job": load(host, port, args.clients, args.requests, status),
+            "get_jobs": load(host, port, args.clients, args.list_requests, list_all),
+            "get_jobs_dashboard": load(host, port, args.clients, args.requests, dashboard),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs registered before the run")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent HTTP clients")
+    parser.add_argument("--requests", type=int, default=4000, help="requests for POST /job and GET /job/{id}")
+    parser.add_argument("--list-requests", type=int, default=400, help="requests for GET /jobs")
+    parser.add_argument("--seed", type=int, default=0)
+    add_output_argument(parser)
+    args = parser.parse_args()
+    emit("api", vars(args), run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
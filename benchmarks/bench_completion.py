@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end latency from a job reaching Completed on the (fake) farm to
+handle_completed_job being called for it.
+
+Registers --jobs jobs of a FakeDeadlineServer farm, runs the watcher against it
+until every job has been handled (or --timeout), and reports the delay between
+each job's simulated completion time and its handler call, plus the number of
+Web Service requests and job status checks the watcher made.
+
+With --chain-length the jobs form dependency chains (like DeadlineManager's
+PLATE/JPG/MOV/SG upload jobs); --register-dependencies also passes each job's
+upstream job at registration instead of leaving it to the Deadline document.
+--batch-by-name groups each chain into one batch that is post-processed once
+(postprocess.batch_by_name); incomplete_batches counts batches handled before
+all their members had finished. --register-after registers the jobs that many
+seconds late, so the first poll sees some members of a chain already finished.
+
+    python benchmarks/bench_completion.py --jobs 200 --render-time 20 --mode thread -o completion.json
+    python benchmarks/bench_completion.py --jobs 20 --chain-length 20 --render-time 5 --register-dependencies
+    python benchmarks/bench_completion.py --jobs 40 --chain-length 4 --render-time 2 --batch-by-name --register-after 4
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import use_bench_config, summarize, emit, add_output_argument
+from benchmarks.fake_deadline import FakeDeadlineServer, FakeFarm
+
+
+def run(args):
+    farm = FakeFarm(jobs=args.jobs, seed=args.seed, queue_time=args.queue_time, render_time=args.render_time,
+                    fail_rate=0.0, suspend_rate=0.0, chain_length=args.chain_length)
+    server = FakeDeadlineServer(farm, latency=args.latency / 1000.0).start()
+    use_bench_config(server.address, check_interval_sec=args.check_interval,
+                     min_check_interval_sec=args.min_check_interval,
+                     postprocess={"batch_by_name": args.batch_by_name})
+
+    from watcher import main, handler, metrics
+    from watcher.jobs import add_job
+
+    handled = {}
+    batch_sizes = []  # (members handled, members in the chain) per batch call
+    chain_sizes = {}
+    for job in farm.all_jobs():
+        chain_sizes[job.batch] = chain_sizes.get(job.batch, 0) + 1
+    all_handled = threading.Event()
+
+    def record(job):
+        handled[job["job_id"]] = time.time()
+        if len(handled) == len(farm.jobs):
+            all_handled.set()
+
+    # Measure detection and dispatch only, not the real post-processing.
+    handler.handle_completed_job = lambda job, postprocessors=None: record(job)
+
+    def record_batch(batch_id, jobs, postprocessors=None):
+        batch_sizes.append((len(jobs), chain_sizes.get(batch_id, 0)))
+        for job in jobs:
+            record(job)
+
+    handler.handle_completed_batch = record_batch
+
+    time.sleep(args.register_after)
+    for job in farm.all_jobs():
+        dependencies = [upstream.job_id for upstream in job.depends_on] if args.register_dependencies else None
+        add_job({"job_id": job.job_id, "job_name": job.name, "plugin": job.plugin, "user": job.user,
+                 "output_path": "", "dependencies": dependencies, "status": "Pending",
+                 "registered_at": time.time()})
+
+    start = time.time()
+    if args.mode == "async":
+        from watcher.async_watcher import AsyncJobWatchManager
+
+        async def watch():
+            manager = AsyncJobWatchManager()
+            task = asyncio.get_running_loop().create_task(manager.run())
+            await asyncio.to_thread(all_handled.wait, args.timeout)
+            task.cancel()
+            await manager.monitor.close()
+
+        asyncio.run(watch())
+    else:
+        manager = main.JobWatchManager()
+        threading.Thread(target=manager.start_watching, daemon=True).start()
+        all_handled.wait(args.timeout)
+    elapsed = time.time() - start
+
+    # Jobs registered after finishing count from their registration.
+    delays = [handled[job.job_id] - max(job.finishes_at, start) for job in farm.all_jobs() if job.job_id in handled]
+    stats = server.get_stats()
+    server.stop()
+    return {
+        "handled": len(handled),
+        "missed": len(farm.jobs) - len(handled),
+        "elapsed_sec": round(elapsed, 3),
+        "completion_to_handler": summarize(delays),
+        "deadline_requests": stats["requests"],
+        "deadline_bytes": stats["bytes_sent"],
+        "job_status_checks": sum(value for _, value in metrics.POLLED_JOBS.collect()["samples"]),
+        "batches": len(batch_sizes),
+        "incomplete_batches": sum(1 for members, expected in batch_sizes if members < expected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queue-time", type=float, default=5.0, help="max seconds a job waits before rendering")
+    parser.add_argument("--render-time", type=float, default=20.0, help="average seconds a job renders")
+    parser.add_argument("--check-interval", type=float, default=10, help="app.check_interval_sec")
+    parser.add_argument("--min-check-interval", type=float, default=2, help="app.min_check_interval_sec")
+    parser.add_argument("--chain-length", type=int, default=1, help="jobs per dependency chain")
+    parser.add_argument("--register-dependencies", action="store_true",
+                        help="pass upstream job ids at registration")
+    parser.add_argument("--batch-by-name", action="store_true", help="post-process each chain once, as a batch")
+    parser.add_argument("--register-after", type=float, default=0.0,
+                        help="seconds the farm runs before the jobs are registered")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake Web Service response delay in ms")
+    parser.add_argument("--mode", choices=("thread", "async"), default="thread",
+                        help="JobWatchManager thread (split mode) or asyncio manager (single mode)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    add_output_argument(parser)
+    args = parser.parse_args()
+    emit("completion", vars(args), run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of watcher/jobs.py add/update/remove against the number of registered jobs,
+for each job store backend.
+
+For every backend and job count the store is pre-filled, then:
+    load          building the registry from the store (process start)
+    add/update/remove
+                  one call through watcher.jobs (in-memory registry, write-behind)
+    flush_batch   writing --ops dirty jobs to the store in one flush
+    flush_single  persisting a single change (flush after one update)
+
+    python benchmarks/bench_store.py --sizes 10,100,1000,10000,50000 -o store.json
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import use_bench_config, summarize, emit, add_output_argument
+
+
+def make_job(index):
+    return {
+        "job_id": "bench%019d" % index,
+        "job_name": "NUKE_shot%03d_v%03d" % (index % 1000, index % 30),
+        "plugin": "Nuke",
+        "user": "bench",
+        "output_path": "/projects/show/render/shot%03d/shot.%%04d.exr" % (index % 1000),
+        "status": "Pending",
+        "registered_at": time.time(),
+    }
+
+
+def open_store(backend, workdir, size):
+    from watcher.job_store import JsonJobStore, SqliteJobStore
+    if backend == "json":
+        store = JsonJobStore(os.path.join(workdir, "jobs-%d.json" % size))
+    else:
+        store = SqliteJobStore(os.path.join(workdir, "jobs-%d.db" % size), legacy_json=os.path.join(workdir, "none.json"))
+    store.write_batch(puts=[make_job(i) for i in range(size)])
+    return store
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_size(backend, workdir, size, ops, single_flushes):
+    from watcher import jobs
+    from watcher.registry import JobRegistry
+
+    store = open_store(backend, workdir, size)
+    # A long flush interval keeps the background flush out of the measurements.
+    start = time.perf_counter()
+    registry = JobRegistry(store, flush_interval=3600)
+    load = time.perf_counter() - start
+    jobs._registry = registry
+
+    new_jobs = [make_job(size + i) for i in range(ops)]
+    details = {"progress": 5, "total_chunks": 10, "errors": 0, "frames": {"completed": 5, "total": 10, "failed": 0}}
+    result = {"jobs": size, "load_ms": round(load * 1000, 3)}
+
+    result["add"] = summarize([timed(jobs.add_job, job) for job in new_jobs])
+    result["flush_batch_add"] = summarize([timed(jobs.flush_jobs)])
+    result["update"] = summarize([timed(jobs.update_job_status, job, "Rendering", details) for job in new_jobs])
+    result["flush_batch_update"] = summarize([timed(jobs.flush_jobs)])
+
+    single = []
+    for job in new_jobs[:single_flushes]:
+        jobs.update_job_status(job, "Rendering", details)
+        single.append(timed(jobs.flush_jobs))
+    result["flush_single"] = summarize(single)
+
+    result["remove"] = summarize([timed(jobs.remove_job, job) for job in new_jobs])
+    result["flush_batch_remove"] = summarize([timed(jobs.flush_jobs)])
+
+    registry.close()
+    store.close()
+    jobs._registry = None
+    return result
+
+
+def run(args):
+    settings = use_bench_config()
+    workdir = os.path.dirname(settings["app"]["job_db"])
+    results = {}
+    for backend in args.backends.split(","):
+        results[backend] = [bench_size(backend, workdir, int(size), args.ops, args.single_flushes)
+                            for size in args.sizes.split(",")]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000,50000", help="comma separated job counts")
+    parser.add_argument("--backends", default="sqlite,json", help="comma separated job store backends")
+    parser.add_argument("--ops", type=int, default=200, help="jobs added/updated/removed per size")
+    parser.add_argument("--single-flushes", type=int, default=20, help="single-change flushes per size")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    emit("store", vars(args), run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
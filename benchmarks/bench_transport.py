@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the pooled keep-alive transport in Deadline/DeadlineSend.py against the
+previous one-connection-per-request urllib path, using the local fake Web Service
+in benchmarks/fake_deadline.py.
+
+    python benchmarks/bench_transport.py --requests 2000 --threads 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.request import urlopen, Request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Deadline import DeadlineSend
+from benchmarks.common import emit, add_output_argument
+from benchmarks.fake_deadline import FakeDeadlineServer, FakeFarm
+
+def legacy_send(address, message):
+    """The pre-pool request path: new Request and TCP connection per call."""
+    response = urlopen(Request("http://" + address + message))
+    data = response.read().decode().replace('\n', ' ')
+    return json.loads(data)
+
+
+def pooled_send(address, message):
+    return DeadlineSend.send(address, message, "GET", useTls=False)
+
+
+def run(send, address, job_id, total, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = total // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            send(address, "/api/jobs?JobID=" + job_id)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    farm = FakeFarm(jobs=1)
+    job_id = next(iter(farm.jobs))
+    server = FakeDeadlineServer(farm).start()
+
+    results = {
+        "legacy_urllib": run(legacy_send, server.address, job_id, args.requests, args.threads),
+        "pooled_keepalive": run(pooled_send, server.address, job_id, args.requests, args.threads),
+    }
+    server.stop()
+    emit("transport", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+CPU and memory of the watcher process at steady state.
+
+Registers --jobs long-running jobs of a FakeDeadlineServer farm, starts the
+watcher in its own process (runner/run_watcher.py, or the API server with the
+watcher inside it for --mode single), waits --warmup seconds and then samples
+its CPU and RSS with psutil for --duration seconds. Also reports how many
+Web Service requests per second the watcher made while sampled.
+
+    python benchmarks/bench_watcher.py --jobs 5000 --duration 60 -o watcher.json
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import psutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import ROOT, use_bench_config, emit, add_output_argument
+from benchmarks.fake_deadline import FakeDeadlineServer, FakeFarm
+
+
+def run(args):
+    # Jobs render far longer than the run, so the watcher polls a constant set.
+    farm = FakeFarm(jobs=args.jobs, seed=args.seed, queue_time=args.duration, render_time=3600 * 24,
+                    fail_rate=0.0, suspend_rate=args.suspend_rate)
+    server = FakeDeadlineServer(farm, latency=args.latency / 1000.0).start()
+    use_bench_config(server.address, mode=args.mode, check_interval_sec=args.check_interval)
+
+    from watcher.job_store import create_job_store
+    store = create_job_store()
+    store.write_batch(puts=[{"job_id": job.job_id, "job_name": job.name, "plugin": job.plugin, "user": job.user,
+                             "output_path": "", "status": "Pending", "registered_at": time.time()}
+                            for job in farm.all_jobs()])
+    store.close()
+
+    script = "run_api.py" if args.mode == "single" else "run_watcher.py"
+    child = subprocess.Popen([sys.executable, os.path.join(ROOT, "runner", script)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        process = psutil.Process(child.pid)
+        time.sleep(args.warmup)
+
+        requests_before = server.get_stats()["requests"]
+        process.cpu_percent(None)
+        cpu, rss = [], []
+        start = time.time()
+        while time.time() - start < args.duration:
+            time.sleep(args.sample_interval)
+            cpu.append(process.cpu_percent(None))
+            rss.append(process.memory_info().rss / (1024 * 1024))
+        elapsed = time.time() - start
+        requests = server.get_stats()["requests"] - requests_before
+        cpu_times = process.cpu_times()
+        threads = process.num_threads()
+    finally:
+        child.terminate()
+        child.wait(timeout=30)
+        server.stop()
+
+    return {
+        "jobs": args.jobs,
+        "mode": args.mode,
+        "cpu_percent_mean": round(sum(cpu) / len(cpu), 2),
+        "cpu_percent_max": round(max(cpu), 2),
+        "cpu_seconds_total": round(cpu_times.user + cpu_times.system, 3),
+        "rss_mb_mean": round(sum(rss) / len(rss), 2),
+        "rss_mb_max": round(max(rss), 2),
+        "threads": threads,
+        "deadline_requests_per_sec": round(requests / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("split", "single"), default="split")
+    parser.add_argument("--check-interval", type=float, default=10, help="app.check_interval_sec")
+    parser.add_argument("--suspend-rate", type=float, default=0.1, help="fraction of idle (Suspended) jobs")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake Web Service response delay in ms")
+    parser.add_argument("--warmup", type=float, default=10.0, help="seconds before sampling starts")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to sample")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    add_output_argument(parser)
+    args = parser.parse_args()
+    emit("watcher", vars(args), run(args), args.output)
+
+
+if __name__ == "__main__":
+    main()
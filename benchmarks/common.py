@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the benchmark scripts: an isolated watcher config, latency
+summaries and the JSON result format.
+
+watcher.config_loader reads its config once, on first import, so call
+use_bench_config() before importing anything from watcher/.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CONFIG_ENV_VAR = "DEADLINE_WATCHER_CONFIG"
+
+
+def use_bench_config(deadline_address="127.0.0.1:8081", workdir=None, postprocess=None, **app_overrides):
+    """
+    Write a settings.yaml whose job store, logs and PID file live in workdir (a new
+    temp dir by default) and point DEADLINE_WATCHER_CONFIG at it, so benchmarks never
+    touch the user's real jobs. Child processes inherit it. postprocess overrides the
+    postprocess section. Returns the settings dict.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="watcher-bench-")
+    host, port = deadline_address.rsplit(":", 1)
+    settings = {
+        "app": {
+            "name": "DeadlineWatcherBench",
+            "mode": "split",
+            "check_interval_sec": 2,
+            "min_check_interval_sec": 0.5,
+            "max_check_interval_sec": 10,
+            "poll_jitter": 0.1,
+            "retry_delay_sec": 1,
+            "log_dir": os.path.join(workdir, "logs"),
+            "log_file": "watcher.log",
+            "job_file": os.path.join(workdir, "jobs.json"),
+            "job_store": "sqlite",
+            "job_db": os.path.join(workdir, "jobs.db"),
+            "flush_interval_sec": 0.2,
+            "notify_fallback_sec": 30,
+            "pid_file": os.path.join(workdir, "watcher.pid"),
+            "plugin_dir": os.path.join(workdir, "plugins"),
+            "metrics_file": os.path.join(workdir, "metrics-watcher.json"),
+        },
+        "deadline": {"ip": host, "port": int(port), "max_jobs_per_request": 50, "cache_ttl_sec": 1.0},
+        # Per-job handling, so completion latency is measured for every job.
+        "postprocess": {"batch_by_name": False},
+        "api": {"host": "127.0.0.1", "port": free_port(), "notify_port": free_port()},
+    }
+    settings["app"].update(app_overrides)
+    settings["postprocess"].update(postprocess or {})
+    path = os.path.join(workdir, "settings.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(settings, f)
+    os.environ[CONFIG_ENV_VAR] = path
+    return settings
+
+
+def free_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize(samples):
+    """
+    Latency summary in milliseconds for a list of durations in seconds.
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def pick(fraction):
+        return round(ordered[min(count - 1, int(count * fraction))] * 1000, 3)
+
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                  text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def emit(name, params, results, output=None):
+    """
+    Print (or write to output) one benchmark result document:
+        {"benchmark": name, "environment": {...}, "params": {...}, "results": {...}}
+    """
+    document = {"benchmark": name, "environment": environment(), "params": params, "results": results}
+    text = json.dumps(document, indent=2)
+    if output and output != "-":
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return document
+
+
+def add_output_argument(parser):
+    parser.add_argument("--output", "-o", default="-", help="JSON result file (default: stdout)")
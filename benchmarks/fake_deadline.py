@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Deadline Web Service, for load and latency testing of the
+watcher and the Deadline/ client without a live farm.
+
+Serves /api/jobs, /api/tasks, /api/jobreports and /api/slaves with payloads shaped
+like the real Web Service. Simulated jobs move Pending/Queued -> Rendering ->
+Completed/Failed on their own as time passes; latency, slow responses and HTTP
+errors can be injected.
+
+    python benchmarks/fake_deadline.py --jobs 20000 --port 8081 --latency 5 --error-rate 0.01
+
+Point config/settings.yaml (deadline.ip/port) at it, or use
+FakeDeadlineServer from a benchmark script.
+"""
+
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Deadline job status codes (see STATUS_MAP in watcher/monitor.py).
+QUEUED, RENDERING, SUSPENDED, COMPLETED, FAILED, PENDING = 0, 1, 2, 3, 4, 6
+# Task status codes used by /api/tasks.
+TASK_QUEUED, TASK_RENDERING, TASK_COMPLETED, TASK_FAILED = 2, 4, 5, 6
+
+PLUGINS = ("Nuke", "MayaBatch", "Houdini", "Arnold", "Redshift")
+USERS = ("anna", "ben", "chris", "dana", "eli")
+
+
+class FakeJob:
+    """
+    One simulated job. Its state is derived from the farm clock, so nothing has
+    to tick in the background: waits pending, then queued, renders its chunks at
+    a steady rate and ends Completed or Failed. A job with depends_on stays
+    Pending until all of those jobs have Completed.
+    """
+    def __init__(self, job_id, submitted, rng, queue_time, render_time, fail_rate, suspend_rate, depends_on=(),
+                 batch=""):
+        self.job_id = job_id
+        self.submitted = submitted
+        self.depends_on = list(depends_on)
+        self.batch = batch
+        self.plugin = rng.choice(PLUGINS)
+        self.user = rng.choice(USERS)
+        self.name = f"{self.plugin.upper()}_shot{rng.randint(1, 999):03d}_v{rng.randint(1, 30):03d}"
+        self.tasks = rng.choice((1, 10, 24, 48, 100, 240))
+        self.pending_time = rng.uniform(0, queue_time) if rng.random() < 0.2 else 0.0
+        self.queue_time = rng.uniform(0, queue_time)
+        self.render_time = rng.uniform(render_time * 0.5, render_time * 1.5)
+        self.fails = rng.random() < fail_rate
+        self.suspended = rng.random() < suspend_rate
+        self.padding = "x" * rng.randint(200, 1200)
+
+    @property
+    def released_at(self):
+        """Farm time the job's dependencies have all Completed, or None if they never will."""
+        released = self.submitted
+        for upstream in self.depends_on:
+            finished = upstream.finishes_at
+            if finished is None or upstream.fails:
+                return None
+            released = max(released, finished)
+        return released
+
+    @property
+    def finishes_at(self):
+        """Farm time the job becomes Completed/Failed, or None if it never will."""
+        released = self.released_at
+        if self.suspended or released is None:
+            return None
+        return released + self.pending_time + self.queue_time + self.render_time
+
+    def state(self, now):
+        """
+        Returns (stat, completed, rendering, queued, errors, started, finished).
+        """
+        if self.suspended:
+            return SUSPENDED, 0, 0, self.tasks, 0, None, None
+        released = self.released_at
+        if released is None or now < released:
+            return PENDING, 0, 0, self.tasks, 0, None, None
+        elapsed = now - released
+        render_start = self.pending_time + self.queue_time
+        if elapsed < self.pending_time:
+            return PENDING, 0, 0, self.tasks, 0, None, None
+        if elapsed < render_start:
+            return QUEUED, 0, 0, self.tasks, 0, None, None
+
+        started = released + render_start
+        finished = started + self.render_time
+        if now < finished:
+            completed = min(self.tasks - 1, int(self.tasks * (now - started) / self.render_time))
+            rendering = min(self.tasks - completed, max(1, self.tasks // 10))
+            return RENDERING, completed, rendering, self.tasks - completed - rendering, 0, started, None
+        if self.fails:
+            completed = self.tasks // 2
+            return FAILED, completed, 0, 0, self.tasks - completed, started, finished
+        return COMPLETED, self.tasks, 0, 0, 0, started, finished
+
+    def document(self, now):
+        stat, completed, rendering, queued, errors, started, finished = self.state(now)
+        return {
+            "_id": self.job_id,
+            "Stat": stat,
+            "CompletedChunks": completed,
+            "RenderingChunks": rendering,
+            "QueuedChunks": queued,
+            "FailedChunks": 0 if stat != FAILED else errors,
+            "SuspendedChunks": queued if stat == SUSPENDED else 0,
+            "PendingChunks": queued if stat == PENDING else 0,
+            "Errs": errors,
+            "Date": _iso(self.submitted),
+            "DateStart": _iso(started),
+            "DateComp": _iso(finished),
+            "Plugin": self.plugin,
+            "Mach": "",
+            "Props": {
+                "Name": self.name,
+                "Batch": self.batch,
+                "User": self.user,
+                "Plug": self.plugin,
+                "Pool": "none",
+                "Grp": "none",
+                "Pri": 50,
+                "Frames": f"1-{self.tasks}",
+                "Chunk": 1,
+                "Tasks": self.tasks,
+                "JobCompletedTasks": completed,
+                "JobFailedTasks": errors,
+                "JobRenderTime": round((min(now, finished or now) - started) if started else 0, 3),
+                "Dep": [{"JobID": upstream.job_id, "OnComp": True} for upstream in self.depends_on],
+                "PlugInfo": {"SceneFile": f"/projects/show/{self.name}.scene", "Notes": self.padding},
+                "Env": {"OCIO": "/pipeline/ocio/config.ocio", "PATH": "/usr/local/bin:/usr/bin"},
+                "OutDir": [f"/projects/show/render/{self.name}"],
+                "OutFile": [f"{self.name}.####.exr"],
+                "ExtraInfo": {str(i): "" for i in range(10)},
+            },
+        }
+
+    def task_documents(self, now):
+        stat, completed, rendering, queued, errors, started, finished = self.state(now)
+        tasks = []
+        for task_id in range(self.tasks):
+            if task_id < completed:
+                task_stat = TASK_COMPLETED
+            elif stat == FAILED:
+                task_stat = TASK_FAILED
+            elif task_id < completed + rendering:
+                task_stat = TASK_RENDERING
+            else:
+                task_stat = TASK_QUEUED
+            tasks.append({
+                "_id": f"{self.job_id}_{task_id}",
+                "JobID": self.job_id,
+                "TaskID": task_id,
+                "Frames": str(task_id + 1),
+                "Stat": task_stat,
+                "Slave": f"render{task_id % 64:03d}" if task_stat != TASK_QUEUED else "",
+                "Errs": 1 if task_stat == TASK_FAILED else 0,
+            })
+        return tasks
+
+    def report_documents(self, now):
+        stat, completed, rendering, queued, errors, started, finished = self.state(now)
+        return [{
+            "_id": f"{self.job_id}_report_{i}",
+            "Job": self.job_id,
+            "Type": 2,
+            "Task": i,
+            "Slave": f"render{i % 64:03d}",
+            "Title": "Error: Render failed",
+            "Date": _iso(finished),
+            "Content": "Traceback (most recent call last):\n" + self.padding,
+        } for i in range(min(errors, 10))]
+
+
+class FakeFarm:
+    """
+    The simulated farm: jobs keyed by ID plus a fixed set of workers.
+    time_scale > 1 makes simulated jobs progress faster than real time.
+    With chain_length > 1 the jobs are submitted in dependency chains of that
+    length, each job depending on the previous one and sharing a BatchName.
+    """
+    def __init__(self, jobs=1000, seed=0, queue_time=30.0, render_time=120.0,
+                 fail_rate=0.05, suspend_rate=0.02, workers=64, time_scale=1.0, chain_length=1):
+        self.rng = random.Random(seed)
+        self.queue_time = queue_time
+        self.render_time = render_time
+        self.fail_rate = fail_rate
+        self.suspend_rate = suspend_rate
+        self.time_scale = time_scale
+        self.origin = time.time()
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.workers = [f"render{i:03d}" for i in range(workers)]
+        previous = None
+        for i in range(jobs):
+            batch = f"chain{i // chain_length:04d}" if chain_length > 1 else ""
+            previous = self.add_job(depends_on=[previous] if previous and i % chain_length else None, batch=batch)
+
+    def now(self):
+        return self.origin + (time.time() - self.origin) * self.time_scale
+
+    def add_job(self, submitted=None, depends_on=None, batch=""):
+        """
+        depends_on: IDs of jobs this one waits for. batch: Deadline BatchName.
+        """
+        with self.lock:
+            job_id = "%024x" % self.rng.getrandbits(96)
+            upstream = [self.jobs[dep_id] for dep_id in depends_on or () if dep_id in self.jobs]
+            self.jobs[job_id] = FakeJob(job_id, self.now() if submitted is None else submitted, self.rng,
+                                        self.queue_time, self.render_time, self.fail_rate, self.suspend_rate,
+                                        upstream, batch)
+        return job_id
+
+    def remove_job(self, job_id):
+        with self.lock:
+            return self.jobs.pop(job_id, None) is not None
+
+    def find(self, job_ids):
+        with self.lock:
+            return [self.jobs[job_id] for job_id in job_ids if job_id in self.jobs]
+
+    def all_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def slave_document(self, name, index, now):
+        return {
+            "Info": {"Name": name, "Stat": 1 if index % 4 else 2, "Host": name, "Pools": "none",
+                     "JobId": "", "Msg": "", "CPU": 16, "RAM": 68719476736},
+            "Settings": {"Name": name, "Enable": True, "Pools": ["none"], "Grps": ["none"]},
+        }
+
+
+class FakeDeadlineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if not server.before_request():
+            return self._send_error(500, "Error: Simulated server error")
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        route = {
+            "/api/jobs": self._jobs,
+            "/api/tasks": self._tasks,
+            "/api/jobreports": self._job_reports,
+            "/api/slaves": self._slaves,
+        }.get(url.path)
+        if route is None:
+            return self._send_error(404, "Error: Not found")
+        self._send_json(route(query, server.farm.now()))
+
+    def do_POST(self):
+        # Job submission: the body is ignored, a new simulated job is created.
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if not self.server.before_request():
+            return self._send_error(500, "Error: Simulated server error")
+        if urlsplit(self.path).path != "/api/jobs":
+            return self._send_error(404, "Error: Not found")
+        farm = self.server.farm
+        job_id = farm.add_job()
+        self._send_json(farm.find([job_id])[0].document(farm.now()))
+
+    def do_DELETE(self):
+        url = urlsplit(self.path)
+        job_ids = parse_qs(url.query).get("JobID", [""])[0].split(",")
+        for job_id in job_ids:
+            self.server.farm.remove_job(job_id)
+        self._send_json("Success")
+
+    def _jobs(self, query, now):
+        farm = self.server.farm
+        if "JobID" in query:
+            job_ids = query["JobID"].split(",")
+            jobs = farm.find(job_ids)
+            if "," not in query["JobID"] and jobs:
+                return jobs[0].document(now)
+        else:
+            jobs = farm.all_jobs()
+        if "States" in query:
+            wanted = set(query["States"].split(","))
+            names = {QUEUED: "Active", RENDERING: "Active", SUSPENDED: "Suspended",
+                     COMPLETED: "Completed", FAILED: "Failed", PENDING: "Pending"}
+            jobs = [job for job in jobs if names[job.state(now)[0]] in wanted]
+        if query.get("IdOnly") == "true":
+            return [job.job_id for job in jobs]
+        return [job.document(now) for job in jobs]
+
+    def _tasks(self, query, now):
+        jobs = self.server.farm.find([query.get("JobID", "")])
+        if not jobs:
+            return "Error: Job not found"
+        tasks = jobs[0].task_documents(now)
+        if "TaskID" in query:
+            task_id = int(query["TaskID"])
+            return tasks[task_id] if 0 <= task_id < len(tasks) else "Error: Task not found"
+        if query.get("IdOnly") == "true":
+            return [task["TaskID"] for task in tasks]
+        return {"ID": jobs[0].job_id, "Tasks": tasks}
+
+    def _job_reports(self, query, now):
+        jobs = self.server.farm.find([query.get("JobID", "")])
+        if not jobs:
+            return "Error: Job not found"
+        reports = jobs[0].report_documents(now)
+        data = query.get("Data", "")
+        if data.endswith("contents"):
+            return [report["Content"] for report in reports]
+        return reports
+
+    def _slaves(self, query, now):
+        farm = self.server.farm
+        names = query["Name"].replace("+", " ").split(",") if "Name" in query else farm.workers
+        if query.get("NamesOnly") == "true":
+            return list(names)
+        documents = [farm.slave_document(name, index, now) for index, name in enumerate(names)]
+        data = query.get("Data", "infosettings")
+        if data == "info":
+            return [document["Info"] for document in documents]
+        if data == "settings":
+            return [document["Settings"] for document in documents]
+        return documents
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self._send(200, body, "application/json")
+
+    def _send_error(self, status, message):
+        self._send(status, message.encode("utf-8"), "text/plain")
+
+    def _send(self, status, body, content_type):
+        headers = {"Content-Type": content_type}
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(body) > 1024:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_response(status, len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDeadlineServer(ThreadingHTTPServer):
+    """
+    HTTP server around a FakeFarm with fault injection:
+        latency       base delay per request (seconds)
+        jitter        extra uniform random delay (seconds)
+        slow_rate     fraction of requests delayed by slow_latency instead
+        error_rate    fraction of requests answered with HTTP 500
+    """
+    daemon_threads = True
+
+    def __init__(self, farm=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 slow_rate=0.0, slow_latency=2.0, error_rate=0.0, seed=0):
+        super().__init__((host, port), FakeDeadlineHandler)
+        self.farm = farm if farm is not None else FakeFarm()
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "slow": 0, "bytes_sent": 0}
+        self.thread = None
+
+    @property
+    def address(self):
+        """host:port, as used for deadline.host/port."""
+        return "%s:%d" % self.server_address[:2]
+
+    def before_request(self):
+        """
+        Applies the injected delay. Returns False if this request should fail.
+        """
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            slow = self.rng.random() < self.slow_rate
+            fail = self.rng.random() < self.error_rate
+            delay = self.slow_latency if slow else self.latency + self.rng.uniform(0, self.jitter)
+            if slow:
+                self.stats["slow"] += 1
+        if delay > 0:
+            time.sleep(delay)
+        return not fail
+
+    def count_response(self, status, size):
+        with self.stats_lock:
+            self.stats["bytes_sent"] += size
+            if status >= 500:
+                self.stats["errors"] += 1
+
+    def get_stats(self):
+        with self.stats_lock:
+            return dict(self.stats)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="FakeDeadline", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _iso(timestamp):
+    if timestamp is None:
+        return "0001-01-01T00:00:00Z"
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--jobs", type=int, default=1000, help="number of simulated jobs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queue-time", type=float, default=30.0, help="max seconds a job waits before rendering")
+    parser.add_argument("--render-time", type=float, default=120.0, help="average seconds a job renders")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="fraction of jobs that end Failed")
+    parser.add_argument("--suspend-rate", type=float, default=0.02, help="fraction of jobs that stay Suspended")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="simulated seconds per real second")
+    parser.add_argument("--chain-length", type=int, default=1, help="jobs per dependency chain")
+    parser.add_argument("--latency", type=float, default=0.0, help="base response delay in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random response delay in ms")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of slow responses")
+    parser.add_argument("--slow-latency", type=float, default=2000.0, help="delay of slow responses in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    args = parser.parse_args()
+
+    farm = FakeFarm(jobs=args.jobs, seed=args.seed, queue_time=args.queue_time, render_time=args.render_time,
+                    fail_rate=args.fail_rate, suspend_rate=args.suspend_rate, time_scale=args.time_scale,
+                    chain_length=args.chain_length)
+    server = FakeDeadlineServer(farm, args.host, args.port, latency=args.latency / 1000.0,
+                                jitter=args.jitter / 1000.0, slow_rate=args.slow_rate,
+                                slow_latency=args.slow_latency / 1000.0, error_rate=args.error_rate, seed=args.seed)
+    print(f"Fake Deadline Web Service with {len(farm.jobs)} jobs on http://{server.address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.get_stats()), file=sys.stderr)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Run every benchmark, each in its own process (the watcher reads its config once
+per process), and write the results as one JSON document:
+
+    {"environment": {...}, "benchmarks": {"store": {...}, "completion": {...}, ...}}
+
+    python benchmarks/run_all.py -o results-1.4.0.json
+    python benchmarks/run_all.py --quick
+
+Compare two result files with any JSON diff tool, or load them side by side.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.common import environment, add_output_argument
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = {
+    "transport": ("bench_transport.py", [], ["--requests", "500"]),
+    "store": ("bench_store.py", [], ["--sizes", "10,1000,10000", "--ops", "50"]),
+    "completion": ("bench_completion.py", [], ["--jobs", "50", "--render-time", "5", "--check-interval", "3",
+                                                "--min-check-interval", "0.5"]),
+    "api": ("bench_api.py", [], ["--requests", "1000", "--list-requests", "50"]),
+    "watcher": ("bench_watcher.py", [], ["--jobs", "1000", "--warmup", "5", "--duration", "15"]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma separated benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, for a smoke run")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only.split(","):
+        script, full_args, quick_args = BENCHMARKS[name]
+        command = [sys.executable, os.path.join(HERE, script)] + (quick_args if args.quick else full_args)
+        print(f"[BENCH] {name}: {' '.join(command[1:])}", file=sys.stderr)
+        completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        if completed.returncode != 0:
+            results[name] = {"error": f"exited with {completed.returncode}"}
+            continue
+        document = json.loads(completed.stdout)
+        results[name] = {"params": document["params"], "results": document["results"]}
+
+    text = json.dumps({"environment": environment(), "benchmarks": results}, indent=2)
+    if args.output and args.output != "-":
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -163,12 +163,16 @@ def start():
         logger.error(f"[Watcher] Failed to start API server: {e}")
         sys.exit(1)
         
-    try:
-        # watcher_proc = subprocess.Popen(watcher_cmd, creationflags=subprocess.CREATE_NO_WINDOW if IS_WINDOWS else 0)
-        watcher_proc = subprocess.Popen(watcher_cmd)
-    except Exception as e:
-        logger.error(f"[Watcher] Failed to start Watcher: {e}")
-        sys.exit(1)
+    watcher_proc = None
+    if config.mode == "single":
+        logger.info("[Watcher] Single-process mode: watcher runs inside the API server")
+    else:
+        try:
+            # watcher_proc = subprocess.Popen(watcher_cmd, creationflags=subprocess.CREATE_NO_WINDOW if IS_WINDOWS else 0)
+            watcher_proc = subprocess.Popen(watcher_cmd)
+        except Exception as e:
+            logger.error(f"[Watcher] Failed to start Watcher: {e}")
+            sys.exit(1)
 
     try:
         while True:
@@ -176,7 +180,8 @@ def start():
     except KeyboardInterrupt:
         logger.info("[Watcher] Shutting down gracefully...")
         api_proc.terminate()
-        watcher_proc.terminate()
+        if watcher_proc:
+            watcher_proc.terminate()
         clear_pid()
         sys.exit(0)
     except Exception as e:
@@ -67,12 +67,13 @@ class DeadlineConnector():
 
 
 # 잡 등록 예시 (Nuke)
-def register_nuke_job(job_id, output_path, plugin, job_name):
+def register_nuke_job(job_id, output_path, plugin, job_name, dependencies=None):
     payload = {
         "job_id": job_id,
         "output_path": output_path,
         "plugin": plugin,
-        "job_name": job_name
+        "job_name": job_name,
+        "dependencies": dependencies
     }
     response = requests.post(API_URL, json=payload)
     print("Nuke Job 등록 결과:", response.status_code, response.json())
@@ -117,7 +118,7 @@ if __name__ == "__main__":
         jobB_id, outB, pluginB, nameB = submit_job("B", "Write_exr2")
         register_nuke_job(jobB_id, outB, pluginB, nameB)
         jobC_id, outC, pluginC, nameC = submit_job("C", "Write_exr3", dependencies=[jobA_id, jobB_id])
-        register_nuke_job(jobC_id, outC, pluginC, nameC)
+        register_nuke_job(jobC_id, outC, pluginC, nameC, dependencies=[jobA_id, jobB_id])
     except Exception as e:
         print(f"An error occurred: {e}")
         traceback.print_exc()
\ No newline at end of file
@@ -1,76 +1,278 @@
 # -*- coding: utf-8 -*-
 
+import json
+import math
 import time
-from fastapi import FastAPI, HTTPException
-from typing import Union
-from pydantic import BaseModel
+import base64
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Any, List, Optional, Union
+from pydantic import BaseModel, ValidationError
+from watcher import metrics, batches, events
 from watcher.config_loader import config
 from watcher.logger import setup_logger
 from watcher.jobs import *
 
 logger = setup_logger()
 app = FastAPI()
+watcher_task = None
 
 class JobInfo(BaseModel):
     job_id: str
     output_path: Union[str, list]
     plugin: str
     job_name: str
+    user: Optional[str] = None
+    dependencies: Optional[List[str]] = None
+    batch_id: Optional[str] = None
 
 @app.post("/job")
 async def register_job(job: JobInfo):
-    from watcher.jobs import get_jobs_snapshot
-    
-    existing_jobs = get_jobs_snapshot()
-    if any(j["job_id"] == job.job_id for j in existing_jobs):
+    if is_job_registered(job.job_id):
         raise HTTPException(status_code=400, detail="Job already registered")
     
+    add_job(new_job_data(job))
+    notify_registered([job.job_id])
+    logger.info(f"[API] Registered job: {job.job_id} (plugin: {job.plugin})")
+    return {"message": "Job registered", "job_id": job.job_id}
+
+@app.post("/jobs/bulk")
+async def register_jobs(jobs: List[Any]):
+    """
+    Register many jobs in one request. Every item is validated on its own;
+    valid, not yet registered jobs are added together and reach the job store
+    in a single write. Returns one result per item, in request order.
+    """
+    results = []
+    accepted = {}
+    for item in jobs:
+        if not isinstance(item, dict):
+            results.append({"job_id": None, "result": "invalid", "detail": "Expected a job object"})
+            continue
+        try:
+            job = JobInfo(**item)
+        except ValidationError as e:
+            results.append({"job_id": item.get("job_id"), "result": "invalid", "detail": str(e)})
+            continue
+        if job.job_id in accepted:
+            results.append({"job_id": job.job_id, "result": "duplicate", "detail": "Job listed twice"})
+            continue
+        accepted[job.job_id] = new_job_data(job)
+        results.append({"job_id": job.job_id, "result": None})
+
+    added = add_jobs(accepted.values())
+    for result in results:
+        if result["result"] is None:
+            registered = result["job_id"] in added
+            result["result"] = "registered" if registered else "duplicate"
+            if not registered:
+                result["detail"] = "Job already registered"
+    notify_registered(added)
+
+    counts = {}
+    for result in results:
+        counts[result["result"]] = counts.get(result["result"], 0) + 1
+    logger.info(f"[API] Bulk registration of {len(results)} jobs: {counts}")
+    return {"results": results, "registered": counts.get("registered", 0),
+            "duplicate": counts.get("duplicate", 0), "invalid": counts.get("invalid", 0)}
+
+def new_job_data(job):
     job_data = job.dict()
     job_data["status"] = "Pending"
     job_data["registered_at"] = time.time()
-    
-    add_job(job_data)
-    logger.info(f"[API] Registered job: {job.job_id} (plugin: {job.plugin})")
-    return {"message": "Job registered", "job_id": job.job_id}
+    return job_data
+
+def notify_registered(job_ids):
+    if watcher_task is not None:
+        from watcher.async_watcher import notify_job_registered
+        for job_id in job_ids:
+            notify_job_registered(job_id)
 
 @app.get("/job/{job_id}")
-async def get_job_status(job_id: str):
+async def get_job_status(request: Request, job_id: str):
     """
     Get the status of a job by its ID
     """
-    from watcher.jobs import get_jobs_snapshot
-    jobs = get_jobs_snapshot()
-    job = next((j for j in jobs if j["job_id"] == job_id), None)
+    # Read the revision before the job: a change in between makes the ETag stale, never the body.
+    revision = get_registry().job_revision(job_id)
+    job = find_job_by_id(job_id)
     
-    if not job:
+    if not job or revision is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return {
+    headers = revision_headers(*revision)
+    if not_modified(request, headers, revision[1]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({
         "job_id": job_id,
         "job_name": job.get("job_name"),
         "plugin": job.get("plugin"),
         "status": job.get("status", "Unknown"),
         "output_path": job.get("output_path"),
+        "batch_id": job.get("batch_id"),
         "registered_at": job.get("registered_at")
+    }, headers=headers)
+
+@app.get("/job/{job_id}/wait")
+async def wait_for_job(job_id: str, until: str = "Completed", timeout: float = 30.0):
+    """
+    Block until the job reaches one of the `until` statuses (comma separated),
+    reaches a final status or is removed, or until timeout seconds have passed
+    """
+    job = find_job_by_id(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    statuses = set(split_ids(until) or [])
+    timeout = max(0.0, min(timeout, config.wait_max_timeout))
+    start = time.monotonic()
+    event, timed_out = await events.get_event_hub().wait(job_id, statuses, timeout, events.job_event(job_id, job))
+    return {
+        "job_id": job_id,
+        "status": event.get("status", "Unknown"),
+        "reached": event.get("status") in statuses,
+        "timed_out": timed_out,
+        "removed": bool(event.get("removed")),
+        "progress": event.get("progress"),
+        "total_chunks": event.get("total_chunks"),
+        "waited_sec": round(time.monotonic() - start, 3),
     }
 
 @app.get("/jobs")
-async def list_jobs():
+async def list_jobs(request: Request, status: Optional[str] = None, plugin: Optional[str] = None,
+                    user: Optional[str] = None, batch_id: Optional[str] = None,
+                    registered_after: Optional[float] = None, registered_before: Optional[float] = None,
+                    name_prefix: Optional[str] = None, fields: Optional[str] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None, since_revision: Optional[str] = None):
     """
-    Get all registered jobs
+    Get registered jobs, oldest registration first, one page at a time.
+    Pass next_cursor back as cursor for the next page; fields selects the
+    returned keys (comma separated).
+
+    With since_revision, returns only the jobs changed and the job_ids removed
+    after that revision (pass back the returned revision next time); 410 if
+    removals that old are no longer remembered or the revision is from before
+    an API restart (revisions are "<epoch>-<n>").
     """
-    from watcher.jobs import get_jobs_snapshot
-    jobs = get_jobs_snapshot()
-    return {"jobs": jobs, "count": len(jobs)}
+    revision = get_registry().collection_revision()
+    headers = revision_headers(*revision)
+    if not_modified(request, headers, revision[1]):
+        return Response(status_code=304, headers=headers)
+
+    selected = split_ids(fields)
+    if selected is not None and "job_id" not in selected:
+        selected.append("job_id")
+
+    if since_revision is not None:
+        since = decode_revision(since_revision)
+        changes = get_registry().changes_since(since, selected) if since is not None else None
+        if changes is None:
+            raise HTTPException(status_code=410, detail="Revision no longer available, list all jobs again")
+        jobs, removed, current = changes
+        return JSONResponse({"jobs": jobs, "removed": removed, "count": len(jobs),
+                             "revision": encode_revision(current)}, headers=headers)
+
+    criteria = {field: value for field, value in
+                (("status", status), ("plugin", plugin), ("user", user), ("batch_id", batch_id)) if value is not None}
+    limit = max(1, min(limit or config.jobs_page_size, config.jobs_max_page_size))
+
+    jobs, next_key, total = query_jobs(criteria=criteria, registered_after=registered_after,
+                                       registered_before=registered_before, name_prefix=name_prefix,
+                                       after=decode_cursor(cursor), limit=limit, fields=selected)
+    return JSONResponse({"jobs": jobs, "count": len(jobs), "total": total, "revision": encode_revision(revision[0]),
+                         "next_cursor": encode_cursor(next_key) if next_key else None}, headers=headers)
+
+def encode_revision(revision):
+    # The epoch changes with every API process, so a revision never outlives a restart.
+    return f"{get_registry().epoch}-{revision}"
+
+def decode_revision(token):
+    """
+    Revision number of a token from encode_revision(), or None if it is from another epoch.
+    """
+    epoch, _, revision = token.rpartition("-")
+    try:
+        revision = int(revision)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since_revision")
+    return revision if epoch == get_registry().epoch else None
+
+def revision_headers(revision, modified_at):
+    # Weak: the body also carries last_check, which changes without a new revision.
+    return {"ETag": f'W/"{encode_revision(revision)}"',
+            "Last-Modified": formatdate(modified_at, usegmt=True)}
+
+def not_modified(request, headers, modified_at):
+    """
+    True if the request's If-None-Match (or, without it, If-Modified-Since) matches.
+    HTTP dates have whole seconds, so a change within the second of the
+    client's copy could look older than it; modified_at is rounded up and
+    such a copy is answered in full. Clients should prefer the ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = opaque_tag(headers["ETag"])
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(opaque_tag(tag) == etag for tag in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return math.ceil(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def opaque_tag(tag):
+    # If-None-Match uses the weak comparison: W/ is ignored.
+    return tag[2:] if tag.startswith("W/") else tag
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        registered_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(registered_at), str(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/batches")
+async def list_batches():
+    """
+    Progress of every batch with registered jobs
+    """
+    summaries = batches.list_batches()
+    return {"batches": summaries, "count": len(summaries)}
+
+@app.get("/batches/{batch_id:path}")
+async def get_batch_status(batch_id: str):
+    """
+    Progress of one batch and the status of its jobs
+    """
+    summary = batches.get_batch(batch_id)
+
+    if not summary:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    summary["members"] = [{
+        "job_id": job.get("job_id"),
+        "job_name": job.get("job_name"),
+        "status": job.get("status", "Unknown"),
+        "progress": job.get("progress", 0),
+        "total_chunks": job.get("total_chunks", 0),
+    } for job in find_jobs(batch_id=batch_id)]
+    return summary
 
 @app.delete("/job/{job_id}")
 async def cancel_job(job_id: str):
     """
     Delete a job by its ID
     """
-    from watcher.jobs import get_jobs_snapshot, remove_job
-    jobs = get_jobs_snapshot()
-    job = next((j for j in jobs if j["job_id"] == job_id), None)
+    job = find_job_by_id(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -79,6 +281,95 @@ async def cancel_job(job_id: str):
     logger.info(f"[API] Stop Watching job: {job_id}")
     return {"message": "Job monitoring cancelled"}
 
+@app.get("/events")
+async def stream_events(request: Request, job_id: Optional[str] = None, batch_id: Optional[str] = None,
+                        plugin: Optional[str] = None):
+    """
+    Server-Sent Events stream of job status/progress changes
+    """
+    hub = events.get_event_hub()
+    subscription = hub.subscribe(split_ids(job_id), batch_id, plugin)
+
+    async def stream():
+        try:
+            yield sse_message("snapshot", snapshot_events(subscription))
+            while not await request.is_disconnected():
+                changes = await subscription.next_events(config.stream_heartbeat)
+                if not changes:
+                    yield ": keepalive\n\n"
+                for event in changes:
+                    yield sse_message("job", event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/ws/events")
+async def websocket_events(websocket: WebSocket, job_id: Optional[str] = None, batch_id: Optional[str] = None,
+                           plugin: Optional[str] = None):
+    """
+    WebSocket stream of job status/progress changes (same messages as /events)
+    """
+    await websocket.accept()
+    hub = events.get_event_hub()
+    subscription = hub.subscribe(split_ids(job_id), batch_id, plugin)
+    try:
+        await websocket.send_json({"type": "snapshot", "jobs": snapshot_events(subscription)})
+        while True:
+            changes = await subscription.next_events(config.stream_heartbeat)
+            if not changes:
+                await websocket.send_json({"type": "keepalive"})
+            for event in changes:
+                await websocket.send_json(dict(event, type="job"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscription)
+
+def split_ids(value):
+    return [job_id.strip() for job_id in value.split(",") if job_id.strip()] if value else None
+
+def snapshot_events(subscription):
+    if subscription.job_ids is not None:
+        jobs = [find_job_by_id(job_id) for job_id in subscription.job_ids]
+    elif subscription.batch_id is not None:
+        jobs = find_jobs(batch_id=subscription.batch_id)
+    else:
+        jobs = get_jobs_snapshot()
+    snapshot = [events.job_event(job["job_id"], job) for job in jobs if job]
+    return [event for event in snapshot if subscription.matches(event)]
+
+def sse_message(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus text format metrics of the API and watcher processes
+    """
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def start_watcher():
+    global watcher_task
+    metrics.JOBS_BY_STATUS.set_function(lambda: get_registry().count_by("status"))
+    get_registry().add_change_listener(events.get_event_hub().publish)
+    if config.mode == "single":
+        from watcher.async_watcher import start_async_watcher
+        watcher_task = start_async_watcher()
+        logger.info("[API] Watcher running in single-process mode")
+    else:
+        from watcher.notify import ChangeNotifier
+        get_registry().add_flush_listener(ChangeNotifier().on_flush)
+
+@app.on_event("shutdown")
+async def flush_registry():
+    if watcher_task is not None:
+        from watcher.async_watcher import stop_async_watcher
+        await stop_async_watcher(watcher_task)
+    flush_jobs()
+
 def start_api_server():
     import uvicorn
     try:
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import time
+import base64
+import asyncio
+import traceback
+from Deadline.Jobs import decodeJobStatuses
+from watcher import metrics
+from watcher.logger import setup_logger
+from watcher.config_loader import config
+from watcher.monitor import DeadlineMonitor
+from watcher.main import JobWatchManager
+
+logger = setup_logger()
+_manager = None
+
+class AsyncDeadlineMonitor(DeadlineMonitor):
+    """
+    DeadlineMonitor that fetches job chunks concurrently with an async HTTP
+    client (httpx). Without httpx it runs the blocking batched fetch in a
+    worker thread instead.
+    """
+    def __init__(self):
+        super().__init__()
+        self.client = None
+        try:
+            import httpx
+        except ImportError:
+            logger.warning("[ASYNC] httpx is not installed; Deadline requests run in a worker thread")
+            return
+
+        props = self.con.connectionProperties
+        scheme = "https://" if props.useTls else "http://"
+        base_url = props.address if props.address.startswith(scheme) else scheme + props.address
+        headers = {}
+        if props.useAuth:
+            credentials = base64.b64encode(f"{props.user}:{props.password}".encode("utf-8")).decode()
+            headers["Authorization"] = f"Basic {credentials}"
+        verify = False if props.insecure else (props.caCert or True)
+        self.client = httpx.AsyncClient(base_url=base_url, headers=headers, verify=verify, timeout=60.0)
+
+    async def get_jobs_details_async(self, job_ids, chunk_size=None):
+        if self.client is None:
+            return await asyncio.to_thread(self.get_jobs_details, job_ids, chunk_size)
+
+        chunks = self._chunks(job_ids, chunk_size)
+        responses = await asyncio.gather(*(self._fetch_chunk(chunk) for chunk in chunks))
+        results = {}
+        for chunk, job_list in zip(chunks, responses):
+            if job_list is not None:
+                results.update(self._parse_chunk(chunk, job_list))
+        return results
+
+    async def _fetch_chunk(self, chunk):
+        status = None
+        start = time.perf_counter()
+        try:
+            response = await self.client.get("/api/jobs", params={"JobID": ",".join(chunk)})
+            status = response.status_code
+            response.raise_for_status()
+            return decodeJobStatuses(response.text)
+        except Exception as e:
+            logger.error(f"[MONITOR] GetJobStatuses failed for {len(chunk)} jobs: {e}")
+            return None
+        finally:
+            metrics.observe_deadline_request("GET", "/api/jobs", status, time.perf_counter() - start)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+
+class AsyncJobWatchManager(JobWatchManager):
+    """
+    JobWatchManager driven by an asyncio task on the API's event loop.
+    Registrations from the API arrive through an in-memory queue and are
+    picked up immediately instead of on the next rescan.
+    """
+    def __init__(self, interval=None, batch_size=None):
+        super().__init__(interval, batch_size, monitor=AsyncDeadlineMonitor())
+        self.queue = asyncio.Queue()
+
+    def notify_job_registered(self, job_id):
+        self.queue.put_nowait(job_id)
+
+    async def run(self):
+        logger.info("[JobWatchManager] Starting async job watch manager")
+        while True:
+            try:
+                self.sync_jobs()
+                now = time.time()
+                due = self.due_watchers(now)
+                if due:
+                    start = time.perf_counter()
+                    results = await self.monitor.get_jobs_details_async([w.job_id for w in due], self.batch_size)
+                    self.dispatch(due, results, now)
+                    metrics.POLL_CYCLE_SECONDS.observe(time.perf_counter() - start)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[JobWatchManager] Poll cycle failed: {e}")
+                traceback.print_exc()
+            # Registrations wake the loop through the queue, so only the next due job bounds the wait.
+            await self._wait_for_registration(min(self.seconds_until_due(time.time()),
+                                                  config.notify_fallback_interval))
+
+    async def _wait_for_registration(self, timeout):
+        try:
+            await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+def start_async_watcher():
+    """
+    Start the watcher as a task on the running event loop (single-process mode).
+    """
+    global _manager
+    _manager = AsyncJobWatchManager()
+    return asyncio.get_running_loop().create_task(_manager.run())
+
+async def stop_async_watcher(task):
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await _manager.monitor.close()
+
+def notify_job_registered(job_id):
+    if _manager is not None:
+        _manager.notify_job_registered(job_id)
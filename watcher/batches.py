@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import time
+import traceback
+from watcher import metrics, plugins, executor
+from watcher.logger import setup_logger
+from watcher.jobs import find_jobs, get_registry, retire_job
+
+logger = setup_logger()
+
+# Member statuses after which a job is not polled any more.
+FAILED_STATUSES = ("Failed", "Error")
+FINISHED_STATUSES = ("Completed",) + FAILED_STATUSES
+
+
+def batch_summary(batch_id, jobs):
+    """
+    Aggregate progress of the registered members of one batch.
+    """
+    by_status = {}
+    progress = total_chunks = 0
+    for job in jobs:
+        status = job.get("status", "Unknown")
+        by_status[status] = by_status.get(status, 0) + 1
+        progress += job.get("progress", 0) or 0
+        total_chunks += job.get("total_chunks", 0) or 0
+
+    finished = sum(count for status, count in by_status.items() if status in FINISHED_STATUSES)
+    if jobs and finished == len(jobs):
+        status = "Failed" if any(by_status.get(status) for status in FAILED_STATUSES) else "Completed"
+    elif finished or by_status.get("Rendering"):
+        status = "Rendering"
+    else:
+        status = max(by_status, key=by_status.get) if by_status else "Unknown"
+
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "jobs": len(jobs),
+        "finished_jobs": finished,
+        "by_status": by_status,
+        "progress": progress,
+        "total_chunks": total_chunks,
+        "progress_pct": round(progress / total_chunks * 100, 1) if total_chunks else 0.0,
+        "registered_at": min((job.get("registered_at") or 0 for job in jobs), default=None),
+    }
+
+def get_batch(batch_id):
+    jobs = find_jobs(batch_id=batch_id)
+    if not jobs:
+        return None
+    return batch_summary(batch_id, jobs)
+
+def list_batches():
+    summaries = (get_batch(batch_id) for batch_id in get_registry().count_by("batch_id") if batch_id)
+    return [summary for summary in summaries if summary is not None]
+
+def member_finished(job):
+    """
+    Called by the watcher when a member of a batch reaches a finished status.
+    Members stay registered until the whole batch has finished; then the batch
+    is post-processed once and all members are removed. Returns True if this
+    was the last member.
+    """
+    return _complete_if_finished(job.get("batch_id"), f"{job.get('job_id')} finished")
+
+def member_removed(job):
+    """
+    Called by the watcher when an unfinished member is unregistered. The batch
+    no longer waits for it, so the remaining members may now all have finished.
+    """
+    return _complete_if_finished(job.get("batch_id"), f"{job.get('job_id')} unregistered")
+
+def _complete_if_finished(batch_id, reason):
+    # Retired members belong to an earlier run of the batch that was already handled.
+    members = [member for member in find_jobs(batch_id=batch_id) if member.get("expires_at") is None]
+    if not members:
+        return False
+    if any(member.get("status") not in FINISHED_STATUSES for member in members):
+        logger.info(f"[BATCH] {reason}, batch {batch_id}: "
+                    f"{sum(1 for m in members if m.get('status') in FINISHED_STATUSES)}/{len(members)} jobs done")
+        return False
+    # Keyed by batch so members seen finishing in the same poll cycle cannot run it twice.
+    executor.submit("complete", complete_batch, batch_id, members, key=f"batch:{batch_id}")
+    return True
+
+def complete_batch(batch_id, members):
+    start = time.perf_counter()
+    failed = [member for member in members if member.get("status") in FAILED_STATUSES]
+    result = "ok"
+    try:
+        if failed:
+            result = "failed"
+            logger.warning(f"[BATCH] Batch {batch_id} finished with {len(failed)}/{len(members)} failed jobs, "
+                           f"skipping post-processing: {[member.get('job_id') for member in failed]}")
+            plugins.handle_failed_batch(batch_id, members, failed)
+        else:
+            logger.info(f"[BATCH] Batch {batch_id} completed ({len(members)} jobs). Running post-processing...")
+            plugins.handle_completed_batch(batch_id, members)
+    except Exception as e:
+        result = "error"
+        logger.error(f"[BATCH] Post-processing failed for batch {batch_id}: {e}")
+        traceback.print_exc()
+    finally:
+        metrics.POSTPROCESS_SECONDS.observe(time.perf_counter() - start, plugin="batch", result=result)
+        for member in members:
+            retire_job(member)
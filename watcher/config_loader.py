@@ -3,9 +3,13 @@
 import os
 import yaml
 
+DEFAULT_CONFIG_PATH = "W:/MTHD_core/DeadlineWatcher/config/settings.yaml"
+# Overrides DEFAULT_CONFIG_PATH, e.g. to run against a local config in benchmarks.
+CONFIG_ENV_VAR = "DEADLINE_WATCHER_CONFIG"
 
 class Config:
-    def __init__(self, config_path="W:/MTHD_core/DeadlineWatcher/config/settings.yaml"):
+    def __init__(self, config_path=None):
+        config_path = config_path or os.environ.get(CONFIG_ENV_VAR) or DEFAULT_CONFIG_PATH
         try:
             if not os.path.exists(config_path):
                 raise FileNotFoundError(f"[Error] Config file not found: {config_path}")
@@ -14,20 +18,60 @@ class Config:
                 cfg = yaml.safe_load(f)
 
             self.app_name = cfg["app"].get("name", "Watcher")
+            self.mode = cfg["app"].get("mode", "split")
             self.check_interval = cfg["app"].get("check_interval_sec", 10)
+            self.min_check_interval = cfg["app"].get("min_check_interval_sec", 2)
+            self.max_check_interval = cfg["app"].get("max_check_interval_sec", 60)
+            self.poll_jitter = cfg["app"].get("poll_jitter", 0.1)
+            self.dependency_check_interval = cfg["app"].get("dependency_check_interval_sec", 300)
             self.retry_delay = cfg["app"].get("retry_delay_sec", 5)
             self.log_dir = os.path.expanduser(cfg["app"].get("log_dir", "~/logs"))
             self.log_file = cfg["app"].get("log_file", "watcher.log")
             self.job_file = os.path.expanduser(cfg["app"].get("job_file", "~/deadline_watcher/jobs.json"))
+            self.job_store = cfg["app"].get("job_store", "sqlite")
+            self.job_db = os.path.expanduser(cfg["app"].get("job_db", "~/deadline_watcher/jobs.db"))
+            self.flush_interval = cfg["app"].get("flush_interval_sec", 1.0)
+            self.notify_fallback_interval = cfg["app"].get("notify_fallback_sec", 30)
+            self.finished_retention = cfg["app"].get("finished_retention_sec", 10)
+            self.plugin_dir = os.path.expanduser(cfg["app"].get("plugin_dir", "~/deadline_watcher/plugins"))
+            self.metrics_file = os.path.expanduser(cfg["app"].get("metrics_file", "~/deadline_watcher/metrics-watcher.json"))
+            self.metrics_interval = cfg["app"].get("metrics_interval_sec", 10)
             self.pid_file = os.path.expanduser(cfg["app"].get("pid_file", "~/deadline_watcher/watcher.pid"))
             self.exe_file = rf'{(cfg["app"].get("exe_file", "//192.168.10.190/substorage/standalone/exe/deadline_watcher.exe"))}'
 
             self.deadline_ip = cfg["deadline"].get("ip", "127.0.0.1")
             self.deadline_port = cfg["deadline"].get("port", 8082)
+            self.max_jobs_per_request = cfg["deadline"].get("max_jobs_per_request", 50)
+            self.deadline_cache_ttl = cfg["deadline"].get("cache_ttl_sec", 1.0)
+            self.deadline_cache_size = cfg["deadline"].get("cache_size", 256)
             self.deadline_api = cfg["deadline"].get("api_url", None)  # legacy, not used
 
+            postprocess = cfg.get("postprocess") or {}
+            self.postprocess_limits = postprocess.get("limits") or {}
+            self.postprocess_dedupe_window = postprocess.get("dedupe_window_sec", 30)
+            self.notification_window = postprocess.get("notification_window_sec", 1.0)
+            self.video_player = postprocess.get("video_player", "system")
+            self.batch_by_name = postprocess.get("batch_by_name", True)
+            self.players = cfg.get("players") or {}
+
+            callback = cfg.get("callback") or {}
+            self.callback_outbox_db = os.path.expanduser(callback.get("outbox_db", "~/deadline_watcher/outbox.db"))
+            self.callback_workers = callback.get("workers", 4)
+            self.callback_per_destination = callback.get("per_destination", 2)
+            self.callback_max_attempts = callback.get("max_attempts", 10)
+            self.callback_backoff = callback.get("backoff_sec", 2)
+            self.callback_max_backoff = callback.get("max_backoff_sec", 600)
+            self.callback_timeout = callback.get("timeout_sec", 30)
+
             self.api_host = cfg["api"].get("host", "127.0.0.1")
             self.api_port = cfg["api"].get("port", 5050)
+            self.notify_port = cfg["api"].get("notify_port", 21041)
+            self.stream_queue_size = cfg["api"].get("stream_queue_size", 1000)
+            self.stream_heartbeat = cfg["api"].get("stream_heartbeat_sec", 15)
+            self.wait_max_timeout = cfg["api"].get("wait_max_timeout_sec", 300)
+            self.jobs_page_size = cfg["api"].get("jobs_page_size", 500)
+            self.jobs_max_page_size = cfg["api"].get("jobs_max_page_size", 5000)
+            self.revision_history = cfg["api"].get("revision_history", 10000)
 
         except Exception as e:
             raise RuntimeError(f"[Error] Failed to load config: {e}")
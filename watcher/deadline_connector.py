@@ -1,12 +1,53 @@
 # -*- coding: utf-8 -*-
 
+import threading
 import Deadline.DeadlineConnect as DeadlineConnect
+from Deadline import DeadlineSend
+from watcher import metrics
 from watcher.config_loader import config
 
+_connections = {}
+_connections_lock = threading.Lock()
+
+DeadlineSend.addRequestHook(metrics.observe_deadline_request)
+
+def get_deadline_con(host, port, use_tls=False, ca_cert=None, insecure=False, auth=None):
+    """
+    Process-wide DeadlineCon shared by every caller with the same
+    (host, port, TLS settings, auth). auth is a (username, password) tuple or None.
+    """
+    key = (host, int(port), use_tls, ca_cert, insecure, auth)
+    with _connections_lock:
+        con = _connections.get(key)
+        if con is None:
+            con = DeadlineConnect.DeadlineCon(host, port, use_tls, ca_cert, insecure)
+            if auth:
+                con.SetAuthenticationCredentials(*auth)
+            con.connectionProperties.ConfigureRequestCache(config.deadline_cache_ttl, config.deadline_cache_size)
+            _connections[key] = con
+        return con
+
+
+def get_cache_statistics():
+    """
+    Request cache lookups of every shared DeadlineCon, summed by outcome.
+    """
+    with _connections_lock:
+        cons = list(_connections.values())
+    totals = {"hit": 0, "miss": 0, "coalesced": 0}
+    for con in cons:
+        stats = con.GetRequestCacheStatistics()
+        totals["hit"] += stats["hits"]
+        totals["miss"] += stats["misses"]
+        totals["coalesced"] += stats["coalesced"]
+    return {(result,): count for result, count in totals.items()}
+
+metrics.DEADLINE_CACHE.set_function(get_cache_statistics)
+
 
 class DeadlineConnector:
     def __init__(self):
-        self.con = DeadlineConnect.DeadlineCon(
+        self.con = get_deadline_con(
             config.deadline_ip,
             config.deadline_port
         )
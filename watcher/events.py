@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from watcher import metrics
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+_hub = None
+_hub_lock = threading.Lock()
+
+# Job fields carried by stream events. A registry change that touches none of
+# them (e.g. only last_check) is not published.
+EVENT_FIELDS = ("status", "progress", "total_chunks", "plugin", "job_name", "batch_id")
+# Statuses a job does not leave; waiting for any other status ends when one of these is reached.
+FINAL_STATUSES = ("Completed", "Failed", "Error")
+
+
+def job_event(job_id, job):
+    """
+    Stream event for a job, or a removal event if job is None.
+    """
+    if job is None:
+        return {"job_id": job_id, "removed": True}
+    event = {"job_id": job_id, "removed": False}
+    for field in EVENT_FIELDS:
+        event[field] = job.get(field)
+    return event
+
+
+class Subscription:
+    """
+    One stream client. Pending events are kept per job and a newer event for the
+    same job replaces the older one, so a slow client skips intermediate progress
+    instead of falling behind. At most max_pending jobs are held; beyond that the
+    oldest entries are dropped.
+    """
+    def __init__(self, loop, job_ids=None, batch_id=None, plugin=None, max_pending=None):
+        self.loop = loop
+        self.job_ids = set(job_ids) if job_ids else None
+        self.batch_id = batch_id
+        self.plugin = plugin.lower() if plugin else None
+        self.max_pending = max_pending or config.stream_queue_size
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()
+        self.ready = asyncio.Event()
+        self.signaled = False
+        self.dropped = 0
+
+    def matches(self, event):
+        if self.job_ids is not None and event["job_id"] not in self.job_ids:
+            return False
+        if self.batch_id is not None and event.get("batch_id") != self.batch_id:
+            return False
+        if self.plugin is not None and str(event.get("plugin") or "").lower() != self.plugin:
+            return False
+        return True
+
+    def offer(self, event):
+        """
+        Queue an event; safe to call from any thread.
+        """
+        with self.lock:
+            self.pending.pop(event["job_id"], None)
+            self.pending[event["job_id"]] = event
+            if len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+                metrics.STREAM_DROPPED.inc()
+            if self.signaled:
+                return
+            self.signaled = True
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            # The client's event loop is gone; it is unsubscribed on its way out.
+            pass
+
+    async def next_events(self, timeout):
+        """
+        Pending events in arrival order, or [] if none arrived within timeout.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        with self.lock:
+            self.ready.clear()
+            self.signaled = False
+            events, self.pending = list(self.pending.values()), OrderedDict()
+        return events
+
+
+class EventHub:
+    """
+    Fans registry changes out to stream subscribers (SSE and WebSocket clients
+    of the API). Registry changes arrive from whichever thread made them: the
+    watcher in single mode, the registry's sync in split mode. However many
+    clients are connected, the jobs are polled once by the watcher.
+
+    Subscriptions for specific jobs (including parked wait() calls) are indexed
+    by job id, so an event only visits the subscribers interested in its job.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.by_job = {}  # job_id -> subscriptions limited to that job
+        self.last = {}  # job_id -> last published event
+        metrics.STREAM_SUBSCRIBERS.set_function(self.subscriber_count)
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(self.subscribers) + len({s for subscriptions in self.by_job.values() for s in subscriptions})
+
+    def publish(self, job_id, job):
+        """
+        JobRegistry change listener.
+        """
+        event = job_event(job_id, job)
+        with self.lock:
+            previous = self.last.get(job_id)
+            if event == previous:
+                return
+            if job is None:
+                self.last.pop(job_id, None)
+                # Removal events carry the last known fields so filters still apply.
+                event = dict(previous or {}, **event)
+            else:
+                self.last[job_id] = event
+            subscribers = list(self.subscribers) + list(self.by_job.get(job_id, ()))
+        event = dict(event, time=time.time())
+        for subscription in subscribers:
+            if subscription.matches(event):
+                subscription.offer(event)
+
+    def subscribe(self, job_ids=None, batch_id=None, plugin=None):
+        """
+        Call from the event loop that will consume the subscription.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), job_ids, batch_id, plugin)
+        with self.lock:
+            if subscription.job_ids is None:
+                self.subscribers.add(subscription)
+            for job_id in subscription.job_ids or ():
+                self.by_job.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+            for job_id in subscription.job_ids or ():
+                subscriptions = self.by_job.get(job_id)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self.by_job[job_id]
+        if subscription.dropped:
+            logger.info(f"[EVENTS] Subscriber dropped {subscription.dropped} stale updates")
+
+    async def wait(self, job_id, statuses, timeout, current):
+        """
+        Wait until the job reaches one of statuses, a final status or is removed.
+        current: the job's event as read from the registry before waiting.
+        Returns the last event seen and whether the wait timed out.
+        """
+        subscription = self.subscribe([job_id])
+        try:
+            # Changes published between reading current and subscribing are in last.
+            with self.lock:
+                event = self.last.get(job_id, current)
+            deadline = time.monotonic() + timeout
+            while not _wait_over(event, statuses):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return event, True
+                for event in await subscription.next_events(remaining):
+                    if _wait_over(event, statuses):
+                        break
+            return event, False
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _wait_over(event, statuses):
+    return event.get("removed") or event.get("status") in statuses or event.get("status") in FINAL_STATUSES
+
+
+def get_event_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = EventHub()
+    return _hub
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import time
+import queue
+import threading
+import traceback
+from watcher import metrics
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+_executor = None
+_executor_lock = threading.Lock()
+
+# Worker threads per action unless postprocess.limits in settings.yaml says otherwise.
+DEFAULT_LIMITS = {
+    "complete": 4,   # handle_completed_job for one job
+    "rv": 2,         # launching RV
+    "video": 2,      # opening a video in the default player
+    "folder": 2,     # opening a folder in the file browser
+}
+
+
+class PostProcessExecutor:
+    """
+    Runs post-processing off the poll thread, in one lane of worker threads per
+    action so slow work (a hung player, a slow network folder) only holds up its own kind.
+
+    submit() takes an optional key: while the same (action, key) is queued or
+    running, or was submitted less than dedupe_window seconds ago, further
+    submissions are dropped. Sibling jobs finishing together therefore open
+    their shared folder or player once.
+    """
+    def __init__(self, limits=None, dedupe_window=None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits if limits is not None else config.postprocess_limits)
+        self.dedupe_window = config.postprocess_dedupe_window if dedupe_window is None else dedupe_window
+        self.lock = threading.Lock()
+        self.lanes = {}
+        self.recent = {}  # (action, key) -> finished at, None while queued or running
+        metrics.POSTPROCESS_QUEUE.set_function(self.queue_depths)
+
+    def submit(self, action, fn, *args, key=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs) on the action's lane. Returns False if it was de-duplicated.
+        """
+        now = time.time()
+        with self.lock:
+            if key is not None:
+                self._forget_before(now - self.dedupe_window)
+                if (action, key) in self.recent:
+                    metrics.POSTPROCESS_ACTIONS.inc(action=action, result="deduplicated")
+                    logger.info(f"[EXECUTOR] Skipping duplicate {action} for {key}")
+                    return False
+                self.recent[(action, key)] = None
+            lane = self._lane(action)
+        lane.put((fn, args, kwargs, key))
+        return True
+
+    def queue_depths(self):
+        with self.lock:
+            return {(action,): lane.qsize() for action, lane in self.lanes.items()}
+
+    def _lane(self, action):
+        lane = self.lanes.get(action)
+        if lane is None:
+            lane = self.lanes[action] = queue.Queue()
+            for i in range(max(1, self.limits.get(action, 1))):
+                threading.Thread(target=self._worker, args=(action, lane), name=f"PostProcess-{action}-{i}",
+                                 daemon=True).start()
+        return lane
+
+    def _worker(self, action, lane):
+        while True:
+            fn, args, kwargs, key = lane.get()
+            result = "ok"
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                result = "error"
+                logger.error(f"[EXECUTOR] {action} failed: {e}")
+                traceback.print_exc()
+            finally:
+                metrics.POSTPROCESS_ACTIONS.inc(action=action, result=result)
+                if key is not None:
+                    with self.lock:
+                        # The dedupe window starts once the action is done.
+                        self.recent[(action, key)] = time.time()
+
+    def _forget_before(self, cutoff):
+        for entry in [entry for entry, finished in self.recent.items() if finished is not None and finished < cutoff]:
+            del self.recent[entry]
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = PostProcessExecutor()
+    return _executor
+
+def submit(action, fn, *args, key=None, **kwargs):
+    return get_executor().submit(action, fn, *args, key=key, **kwargs)
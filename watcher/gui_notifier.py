@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import time
+import queue
+import threading
+import traceback
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+_notifier = None
+_notifier_lock = threading.Lock()
+
+LEVELS = ("info", "warning", "error")
+# Messages listed in one aggregated notification before "... and N more".
+MAX_AGGREGATED_LINES = 10
+# How often the Qt thread drains the request queue (milliseconds).
+DRAIN_INTERVAL_MS = 100
+
+
+class GuiNotifier:
+    """
+    One resident Qt thread for all desktop notifications of the process.
+
+    PySide6 and the QApplication are started once, on the first notify().
+    Requests arrive through a queue; the Qt thread shows them as non-modal
+    message boxes, so callers never block. Requests with the same level and
+    title that arrive within aggregate_window seconds of each other are shown
+    as one box listing them all (e.g. 200 chunk jobs completing together).
+
+    Without PySide6 notifications are only logged.
+    """
+    def __init__(self, aggregate_window=None):
+        self.aggregate_window = config.notification_window if aggregate_window is None else aggregate_window
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.available = True
+
+    def notify(self, title, message, level="info"):
+        if level not in LEVELS:
+            level = "info"
+        if not self.available:
+            self._log(level, title, message)
+            return
+        self.requests.put((time.time(), level, title, message))
+        self._ensure_started()
+        if not self.available:
+            # PySide6 turned out to be missing while this request was queued.
+            self._drain_to_log()
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="GuiNotifier", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        try:
+            from PySide6.QtCore import QTimer
+            from PySide6.QtWidgets import QApplication
+        except ImportError as e:
+            logger.warning(f"[NOTIFIER] PySide6 is not available, notifications are logged only: {e}")
+            self.available = False
+            self._drain_to_log()
+            return
+
+        app = QApplication.instance() or QApplication([])
+        app.setQuitOnLastWindowClosed(False)
+        self.windows = set()
+        self.pending = []
+        timer = QTimer()
+        timer.timeout.connect(self._drain)
+        timer.start(DRAIN_INTERVAL_MS)
+        logger.info("[NOTIFIER] Notification thread started")
+        app.exec()
+
+    def _drain(self):
+        try:
+            while True:
+                self.pending.append(self.requests.get_nowait())
+        except queue.Empty:
+            pass
+        # Wait until no new request arrived for aggregate_window, so a burst becomes one box.
+        if self.pending and time.time() - self.pending[-1][0] >= self.aggregate_window:
+            pending, self.pending = self.pending, []
+            for level, title, message in aggregate(pending):
+                try:
+                    self._show(level, title, message)
+                except Exception as e:
+                    logger.error(f"[NOTIFIER] Failed to show notification: {e}")
+                    traceback.print_exc()
+
+    def _show(self, level, title, message):
+        from PySide6.QtCore import Qt
+        from PySide6.QtWidgets import QMessageBox
+
+        icon = {"info": QMessageBox.Information, "warning": QMessageBox.Warning, "error": QMessageBox.Critical}[level]
+        box = QMessageBox(icon, title, message)
+        box.setWindowModality(Qt.NonModal)
+        box.setAttribute(Qt.WA_DeleteOnClose)
+        box.setWindowFlag(Qt.WindowStaysOnTopHint)
+        box.finished.connect(lambda _result, box=box: self.windows.discard(box))
+        self.windows.add(box)
+        box.show()
+        self._log(level, title, message)
+
+    def _drain_to_log(self):
+        pending = []
+        try:
+            while True:
+                pending.append(self.requests.get_nowait())
+        except queue.Empty:
+            pass
+        for level, title, message in aggregate(pending):
+            self._log(level, title, message)
+
+    @staticmethod
+    def _log(level, title, message):
+        log = {"info": logger.info, "warning": logger.warning, "error": logger.error}[level]
+        log(f"[NOTIFIER] {title}: {message}")
+
+
+def aggregate(requests):
+    """
+    requests: [(time, level, title, message)] in arrival order.
+    Returns [(level, title, message)], one per (level, title), with the number of
+    requests added to the title when there was more than one.
+    """
+    groups = {}
+    for _, level, title, message in requests:
+        groups.setdefault((level, title), []).append(message)
+
+    notifications = []
+    for (level, title), messages in groups.items():
+        # Identical messages (e.g. "RV is not installed" for every job) are shown once.
+        unique = list(dict.fromkeys(messages))
+        if len(messages) > 1:
+            title = f"{title} ({len(messages)})"
+        if len(unique) == 1:
+            notifications.append((level, title, unique[0]))
+            continue
+        lines = unique[:MAX_AGGREGATED_LINES]
+        if len(unique) > MAX_AGGREGATED_LINES:
+            lines.append(f"... and {len(unique) - MAX_AGGREGATED_LINES} more")
+        notifications.append((level, title, "\n".join(lines)))
+    return notifications
+
+
+def get_notifier():
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = GuiNotifier()
+    return _notifier
+
+def notify(title, message, level="info"):
+    get_notifier().notify(title, message, level)
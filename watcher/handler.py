@@ -3,14 +3,20 @@
 import os
 import sys
 import time
-import requests
 import subprocess
+from watcher import executor, gui_notifier
+from watcher.outbox import get_outbox
 from watcher.logger import setup_logger
-from watcher.utils import get_latest_rv_path
+from watcher.config_loader import config
+from watcher.utils import get_latest_rv_path, get_player_path
 
 logger = setup_logger()
 
-def handle_completed_job(job):
+def handle_completed_job(job, postprocessors=None):
+    """
+    postprocessors: plugin name -> postprocess(job) from the plugin directory
+    (see watcher/plugins.py); they take precedence over the built-in ones below.
+    """
     try:
         job_name = job.get("name", "Unnamed")
         job_id = job.get("job_id")
@@ -38,7 +44,11 @@ def handle_completed_job(job):
         return
 
     try:
-        if plugin == "nuke":
+        postprocess = (postprocessors or {}).get(plugin)
+        if postprocess is not None:
+            logger.info(f"[HANDLE] {plugin} plugin post-processing... {output_path}")
+            postprocess(job)
+        elif plugin == "nuke":
             logger.info(f"[HANDLE] NUKE post-processing... {output_path}")
             postprocess_nuke(job)
         elif plugin == "maya":
@@ -56,27 +66,66 @@ def handle_completed_job(job):
         else:
             if output_path.lower().endswith((".mov", ".mp4", ".avi", ".mxf", ".mkv", ".exr", ".dpx")):
                 logger.info(f"[HANDLE] Playing video: {output_path}")
-                play_video(output_path)
+                executor.submit("video", play_video, output_path, key=output_path)
             else:
                 logger.info(f"[HANDLE] Opening folder: {os.path.dirname(output_path)}")
-                open_folder(os.path.dirname(output_path))
+                executor.submit("folder", open_folder, os.path.dirname(output_path), key=os.path.dirname(output_path))
 
     except Exception as e:
         logger.error(f"[HANDLE] Failed to handle completed job: {e} | job: {job}")
 
+def handle_completed_batch(batch_id, jobs, postprocessors=None):
+    """
+    Post-processing for a batch whose jobs have all completed: members writing
+    to the same output are post-processed once, and one callback is sent for
+    the whole batch instead of one per job.
+    """
+    logger.info(f"[HANDLE] Handling completed batch: {batch_id} | {len(jobs)} jobs")
+
+    callback_job = next((job for job in jobs if job.get("callback_url")), None)
+    if callback_job is not None:
+        try:
+            send_batch_callback(batch_id, jobs, callback_job["callback_url"], callback_job.get("webhook_data", {}))
+        except Exception as e:
+            logger.error(f"[HANDLE] Failed to send batch callback: {e} | batch: {batch_id}")
+
+    handled = set()
+    for job in jobs:
+        output_path = job.get("output_path")
+        key = (str(job.get("plugin", "")).lower(), str(output_path[0] if isinstance(output_path, list) else output_path))
+        if key in handled:
+            continue
+        handled.add(key)
+        member = dict(job)
+        member.pop("callback_url", None)
+        handle_completed_job(member, postprocessors)
+
+def handle_failed_batch(batch_id, jobs, failed):
+    """
+    A batch with failed members is not post-processed, but its callback is
+    still sent (status "failed") so the caller learns the batch is over.
+    """
+    failed_ids = [job.get("job_id") for job in failed]
+    logger.info(f"[HANDLE] Handling failed batch: {batch_id} | {len(failed_ids)}/{len(jobs)} jobs failed")
+
+    callback_job = next((job for job in jobs if job.get("callback_url")), None)
+    if callback_job is not None:
+        try:
+            send_batch_callback(batch_id, jobs, callback_job["callback_url"], callback_job.get("webhook_data", {}),
+                                status="failed", failed_job_ids=failed_ids)
+        except Exception as e:
+            logger.error(f"[HANDLE] Failed to send batch callback: {e} | batch: {batch_id}")
+
 def postprocess_nuke(job):
     try:
         output_path = job.get("output_path")
         if output_path.lower().endswith(".mov"):
             rv_path = get_latest_rv_path()
             if not rv_path:
-                from PySide6.QtWidgets import QMessageBox, QApplication
-                app = QApplication([])
-                QMessageBox.critical(None, "Error", "RV가 설치되어 있지 않아 파일을 열 수 없습니다.")
-                app.exec_()
+                gui_notifier.notify("Error", "RV가 설치되어 있지 않아 파일을 열 수 없습니다.", level="error")
                 return
             logger.info(f"[NUKE] Run RV for output: {output_path}")
-            subprocess.Popen([rv_path, output_path])
+            executor.submit("rv", subprocess.Popen, [rv_path, output_path], key=output_path)
     except Exception as e:
         logger.error(f"[NUKE] Failed to post-process Nuke job: {e} | job: {job}")
 
@@ -99,13 +148,6 @@ def postprocess_houdini(job):
 
 def postprocess_autotrack(job):
     try:
-        from PySide6.QtWidgets import QMessageBox, QApplication
-        app = QApplication.instance()
-        need_exec = False
-        if not app:
-            app = QApplication([])
-            need_exec = True    
-                    
         output_path = job.get("output_path")
         job_name = job.get('job_name')
         if isinstance(output_path, list):
@@ -113,19 +155,17 @@ def postprocess_autotrack(job):
             python_script_path = output_path[1]
             nuke_output_path = f'{path}/scenes/{job_name}.nk'
             if not os.path.exists(python_script_path) and os.path.exists(nuke_output_path):
-                QMessageBox.information(None, "Job Finished", "Auto Track이 완료되었습니다.")
+                gui_notifier.notify("Job Finished", "Auto Track이 완료되었습니다.")
                 logger.info(f"[AutoTrack] Auto Track completed successfully.")
             else:
-                QMessageBox.warning(None, "Error", f"Auto Track이 중단되었습니다.\n로그파일을 확인하여 주세요.")
+                gui_notifier.notify("Error", f"Auto Track이 중단되었습니다.\n로그파일을 확인하여 주세요.", level="warning")
                 logger.error(f"[AutoTrack] Auto Track failed or was interrupted. Check log file.")
-                
-            open_folder(os.path.dirname(path))
-            logger.info(f"[AutoTrack] Opening output folder: {os.path.dirname(path)}")
-            
-            if need_exec:
-                app.exec_()
+
+            folder = os.path.dirname(path)
+            executor.submit("folder", open_folder, folder, key=folder)
+            logger.info(f"[AutoTrack] Opening output folder: {folder}")
             return
-        
+
     except Exception as e:
         import traceback
         logger.error(f"[AutoTrack] Failed to execute Python script: {e} | job: {job}")
@@ -133,9 +173,6 @@ def postprocess_autotrack(job):
         
 def postprocess_python(job):
     try:
-        from PySide6.QtWidgets import QMessageBox, QApplication
-        app = QApplication([])
-        
         output_path = job.get("output_path")
         job_name = job.get('job_name')
         if isinstance(output_path, list):
@@ -143,19 +180,19 @@ def postprocess_python(job):
             python_script_path = output_path[1]
             nuke_output_path = f'{path}/scenes/{job_name}.nk'
             if not os.path.exists(python_script_path) and os.path.exists(nuke_output_path):
-                QMessageBox.information(None, "Job Finished", "Auto Track이 완료되었습니다.")
+                gui_notifier.notify("Job Finished", "Auto Track이 완료되었습니다.")
             else:
-                QMessageBox.warning(None, "Error", f"Auto Track이 중단되었습니다.\n로그파일을 확인하여 주세요.")
-                
-            open_folder(os.path.dirname(path))
-            app.exec_()
+                gui_notifier.notify("Error", f"Auto Track이 중단되었습니다.\n로그파일을 확인하여 주세요.", level="warning")
+
+            folder = os.path.dirname(path)
+            executor.submit("folder", open_folder, folder, key=folder)
             return
         
     except Exception as e:
         logger.error(f"[PYTHON] Failed to execute Python script: {e} | job: {job}")
 
 def send_completion_callback(job_id, job_name, output_path, callback_url, webhook_data):
-    """완료 콜백 전송"""
+    """완료 콜백 전송 (outbox에 저장, 전송은 백그라운드 워커가 담당)"""
     try:
         payload = {
             "job_id": job_id,
@@ -165,26 +202,38 @@ def send_completion_callback(job_id, job_name, output_path, callback_url, webhoo
             "completed_at": time.time(),
             **webhook_data
         }
-        
-        response = requests.post(
-            callback_url, 
-            json=payload, 
-            timeout=30,
-            headers={"Content-Type": "application/json"}
-        )
-        response.raise_for_status()
-        
-        logger.info(f"[CALLBACK] Successfully sent callback to {callback_url} for job {job_id}")
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"[CALLBACK] Failed to send callback: {e} | job_id: {job_id} | callback_url: {callback_url}")
+        callback_id = get_outbox().enqueue(callback_url, payload)
+        logger.info(f"[CALLBACK] Queued callback {callback_id} to {callback_url} for job {job_id}")
+
+    except Exception as e:
+        logger.error(f"[CALLBACK] Failed to queue callback: {e} | job_id: {job_id} | callback_url: {callback_url}")
+
+def send_batch_callback(batch_id, jobs, callback_url, webhook_data, status="completed", failed_job_ids=None):
+    """배치 완료/실패 콜백 전송 (배치당 한 번)"""
+    try:
+        payload = {
+            "batch_id": batch_id,
+            "job_ids": [job.get("job_id") for job in jobs],
+            "status": status,
+            "output_paths": [job.get("output_path") for job in jobs],
+            "completed_at": time.time(),
+            **webhook_data
+        }
+        if failed_job_ids:
+            payload["failed_job_ids"] = failed_job_ids
+        callback_id = get_outbox().enqueue(callback_url, payload)
+        logger.info(f"[CALLBACK] Queued callback {callback_id} to {callback_url} for batch {batch_id}")
+
     except Exception as e:
-        logger.error(f"[CALLBACK] Unexpected error while sending callback: {e} | job_id: {job_id} | callback_url: {callback_url}")
+        logger.error(f"[CALLBACK] Failed to queue callback: {e} | batch_id: {batch_id} | callback_url: {callback_url}")
 
 
 def play_video(path):
     try:
-        if os.name == 'nt':  # Windows
+        player = get_player_path(config.video_player) if config.video_player != "system" else None
+        if player:
+            subprocess.Popen([player, path])
+        elif os.name == 'nt':  # Windows
             os.startfile(path)
         elif sys.platform == "darwin":  # macOS
             subprocess.Popen(["open", path])
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+
+class JobStore:
+    """
+    Persistence backend for registered jobs. Jobs are dicts keyed by "job_id".
+    """
+    def load_all(self):
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def add(self, job):
+        raise NotImplementedError
+
+    def remove(self, job_id):
+        raise NotImplementedError
+
+    def update(self, job_id, fields):
+        """
+        Merge fields into an existing job. Does nothing if the job is not stored.
+        """
+        raise NotImplementedError
+
+    def write_batch(self, puts=(), updates=(), deletes=()):
+        """
+        Apply many changes at once: insert/replace puts, overwrite updates only
+        where the job is still stored, delete the deletes job IDs.
+        """
+        raise NotImplementedError
+
+    def change_token(self):
+        """
+        Cheap value that changes when another process modifies the store.
+        """
+        raise NotImplementedError
+
+    def change_cursor(self):
+        """
+        Position in the store's change log, for changes_since(); None if the store keeps no log.
+        Read it before load_all() so nothing committed in between is missed.
+        """
+        return None
+
+    def changes_since(self, cursor):
+        """
+        (jobs, deleted job_ids, new cursor) for what other processes committed
+        after cursor, or None if the store cannot tell; the caller then reloads
+        everything with load_all().
+        """
+        return None
+
+    def close(self):
+        pass
+
+
+class JsonJobStore(JobStore):
+    """
+    Legacy backend: the whole job list in one JSON file, rewritten on every change.
+    """
+    def __init__(self, path=None):
+        self.path = path or config.job_file
+        self.lock = threading.Lock()
+        self._written_token = None
+        self._seen_token = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"[JOBS] Failed to load jobs: {e}")
+            return []
+
+    def _write(self, jobs):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(jobs, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._written_token = self._stat_token()
+
+    def load_all(self):
+        with self.lock:
+            return self._read()
+
+    def get(self, job_id):
+        return next((j for j in self.load_all() if j.get("job_id") == job_id), None)
+
+    def add(self, job):
+        with self.lock:
+            jobs = self._read()
+            jobs.append(job)
+            self._write(jobs)
+
+    def remove(self, job_id):
+        with self.lock:
+            jobs = self._read()
+            self._write([j for j in jobs if j.get("job_id") != job_id])
+
+    def update(self, job_id, fields):
+        with self.lock:
+            jobs = self._read()
+            for j in jobs:
+                if j.get("job_id") == job_id:
+                    j.update(fields)
+            self._write(jobs)
+
+    def write_batch(self, puts=(), updates=(), deletes=()):
+        with self.lock:
+            jobs = {j.get("job_id"): j for j in self._read()}
+            for job in updates:
+                if job.get("job_id") in jobs:
+                    jobs[job.get("job_id")] = job
+            for job in puts:
+                jobs[job.get("job_id")] = job
+            for job_id in deletes:
+                jobs.pop(job_id, None)
+            self._write(list(jobs.values()))
+
+    def change_token(self):
+        # mtime/size moves on our own writes too; only report the ones we did not make.
+        token = self._stat_token()
+        if token != self._written_token:
+            self._seen_token = token
+        return self._seen_token
+
+    def _stat_token(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+
+class SqliteJobStore(JobStore):
+    """
+    SQLite backend in WAL mode. One row per job, so an update rewrites a single
+    row, and the API and watcher processes can share the file safely.
+
+    Every write transaction takes the next number from store_seq and stamps it,
+    with the writing connection's id, on the rows it writes and on the
+    deleted_jobs entries of the rows it deletes. changes_since() then reads only
+    what the other process wrote after a cursor. The deletion log keeps the
+    last DELETION_LOG_WRITES transactions; a reader further behind reloads.
+    """
+    DELETION_LOG_WRITES = 10000
+
+    def __init__(self, path=None, legacy_json=None):
+        self.path = path or config.job_db
+        self.lock = threading.Lock()
+        self.writer = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._migrate_json(legacy_json if legacy_json is not None else config.job_file)
+
+    def _create_schema(self):
+        with self.lock:
+            # Both processes may open a new or older database at the same time.
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        job_id TEXT PRIMARY KEY,
+                        status TEXT,
+                        registered_at REAL,
+                        data TEXT NOT NULL
+                    )
+                    """
+                )
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+                if "seq" not in columns:
+                    self.conn.execute("ALTER TABLE jobs ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+                if "writer" not in columns:
+                    self.conn.execute("ALTER TABLE jobs ADD COLUMN writer TEXT")
+                self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+                self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_registered_at ON jobs(registered_at)")
+                self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_seq ON jobs(seq)")
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS deleted_jobs (job_id TEXT PRIMARY KEY, seq INTEGER NOT NULL, writer TEXT)"
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS idx_deleted_jobs_seq ON deleted_jobs(seq)")
+                # seq: last write transaction; pruned: deletions up to this seq are forgotten.
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS store_seq (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                    "seq INTEGER NOT NULL, pruned INTEGER NOT NULL)"
+                )
+                self.conn.execute("INSERT OR IGNORE INTO store_seq (id, seq, pruned) VALUES (0, 0, 0)")
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _migrate_json(self, json_path):
+        """
+        Import an existing jobs.json once, then rename it to *.migrated.
+        The rename happens while the write lock is held, so when the API and
+        the watcher start together exactly one of them migrates.
+        """
+        if not json_path or not os.path.exists(json_path):
+            return
+        migrated_path = json_path + ".migrated"
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            renamed = False
+            try:
+                # Another process may have migrated while we waited for the write lock.
+                if not os.path.exists(json_path):
+                    self.conn.execute("COMMIT")
+                    return
+                with open(json_path, "r", encoding="utf-8") as f:
+                    jobs = json.load(f) or []
+                self._put([job for job in jobs if job.get("job_id")], self._next_seq())
+                os.replace(json_path, migrated_path)
+                renamed = True
+                self.conn.execute("COMMIT")
+            except Exception as e:
+                self.conn.execute("ROLLBACK")
+                if renamed:
+                    # The jobs were not stored; leave jobs.json to be migrated next time.
+                    os.replace(migrated_path, json_path)
+                logger.error(f"[JOBS] Failed to migrate {json_path}: {e}")
+                return
+        logger.info(f"[JOBS] Migrated {len(jobs)} jobs from {json_path} to {self.path}")
+
+    @staticmethod
+    def _row(job):
+        return (
+            job.get("job_id"),
+            job.get("status"),
+            job.get("registered_at"),
+            json.dumps(job, ensure_ascii=False)
+        )
+
+    # The helpers below run inside a write transaction.
+
+    def _next_seq(self):
+        self.conn.execute("UPDATE store_seq SET seq = seq + 1 WHERE id = 0")
+        seq, pruned = self.conn.execute("SELECT seq, pruned FROM store_seq WHERE id = 0").fetchone()
+        if seq - pruned > 2 * self.DELETION_LOG_WRITES:
+            pruned = seq - self.DELETION_LOG_WRITES
+            self.conn.execute("DELETE FROM deleted_jobs WHERE seq <= ?", (pruned,))
+            self.conn.execute("UPDATE store_seq SET pruned = ? WHERE id = 0", (pruned,))
+        return seq
+
+    def _put(self, jobs, seq):
+        rows = [self._row(job) for job in jobs]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO jobs (job_id, status, registered_at, data, seq, writer) VALUES (?, ?, ?, ?, ?, ?)",
+            [row + (seq, self.writer) for row in rows]
+        )
+        # A job exists in at most one of jobs and deleted_jobs.
+        self.conn.executemany("DELETE FROM deleted_jobs WHERE job_id = ?", [row[:1] for row in rows])
+
+    def _update(self, jobs, seq):
+        self.conn.executemany(
+            "UPDATE jobs SET status = ?, registered_at = ?, data = ?, seq = ?, writer = ? WHERE job_id = ?",
+            [self._row(job)[1:] + (seq, self.writer, job.get("job_id")) for job in jobs]
+        )
+
+    def _delete(self, job_ids, seq):
+        for job_id in job_ids:
+            if self.conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)).rowcount:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO deleted_jobs (job_id, seq, writer) VALUES (?, ?, ?)",
+                    (job_id, seq, self.writer)
+                )
+
+    def load_all(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT data FROM jobs ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, job):
+        self.write_batch(puts=[job])
+
+    def remove(self, job_id):
+        self.write_batch(deletes=[job_id])
+
+    def update(self, job_id, fields):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row:
+                    job = json.loads(row[0])
+                    job.update(fields)
+                    self._update([job], self._next_seq())
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def write_batch(self, puts=(), updates=(), deletes=()):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._next_seq()
+                self._update(updates, seq)
+                self._put(puts, seq)
+                self._delete(deletes, seq)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def change_token(self):
+        # data_version only moves when another connection commits.
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def change_cursor(self):
+        with self.lock:
+            return self.conn.execute("SELECT seq FROM store_seq WHERE id = 0").fetchone()[0]
+
+    def changes_since(self, cursor):
+        if cursor is None:
+            return None
+        with self.lock:
+            # One read transaction, so the rows and the new cursor come from the same snapshot.
+            self.conn.execute("BEGIN")
+            try:
+                seq, pruned = self.conn.execute("SELECT seq, pruned FROM store_seq WHERE id = 0").fetchone()
+                if cursor < pruned or cursor > seq:
+                    return None
+                rows = self.conn.execute(
+                    "SELECT data FROM jobs WHERE seq > ? AND writer IS NOT ? ORDER BY seq", (cursor, self.writer)
+                ).fetchall()
+                deleted = self.conn.execute(
+                    "SELECT job_id FROM deleted_jobs WHERE seq > ? AND writer IS NOT ?", (cursor, self.writer)
+                ).fetchall()
+            finally:
+                self.conn.execute("COMMIT")
+        return [json.loads(row[0]) for row in rows], [row[0] for row in deleted], seq
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def create_job_store():
+    """
+    Build the job store selected by app.job_store in settings.yaml.
+    """
+    if config.job_store == "json":
+        return JsonJobStore()
+    if config.job_store != "sqlite":
+        logger.warning(f"[JOBS] Unknown job_store '{config.job_store}', using sqlite")
+    return SqliteJobStore()
@@ -1,68 +1,80 @@
 # -*- coding: utf-8 -*-
 
 import time
-import json
 import threading
 from watcher.config_loader import config
 from watcher.logger import setup_logger
+from watcher.job_store import create_job_store
+from watcher.registry import JobRegistry
 
 logger = setup_logger()
-jobs_lock = threading.Lock()
-
-def _load_jobs():
-    try:
-        with jobs_lock:
-            with open(config.job_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except FileNotFoundError:
-        with open(config.job_file, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.error(f"[JOBS] Failed to load jobs: {e}")        
-        return []
-
-def _save_jobs(jobs):
-    with jobs_lock:
-        with open(config.job_file, "w", encoding="utf-8") as f:
-            json.dump(jobs, f, ensure_ascii=False, indent=2)
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry(create_job_store())
+    return _registry
 
 def add_job(job_data):
-    jobs = _load_jobs()
-    jobs.append(job_data)
-    _save_jobs(jobs)
+    get_registry().add(job_data)
+
+def add_jobs(jobs):
+    """
+    Register several jobs at once, skipping already registered ones. Returns the set of job_ids added.
+    """
+    return get_registry().add_many(jobs)
 
 def remove_job(job_data):
-    jobs = _load_jobs()
-    jobs = [j for j in jobs if j.get("job_id") != job_data.get("job_id")]
-    _save_jobs(jobs)
+    get_registry().remove(job_data.get("job_id"))
+
+def retire_job(job_data):
+    """
+    Remove a finished job after app.finished_retention_sec, so API clients still see its final status.
+    """
+    get_registry().retire(job_data.get("job_id"), config.finished_retention)
 
 def get_jobs_snapshot():
-    return _load_jobs()
+    return get_registry().all()
 
 def update_job_status(job, status, details=None):
-    jobs = _load_jobs()
-    for j in jobs:
-        if j.get("job_id") == job.get("job_id"):
-            j["status"] = status
-            j["last_check"] = time.time()
-            if details:
-                j["progress"] = details.get("progress", 0)
-                j["total_chunks"] = details.get("total_chunks", 0)
-                j["errors"] = details.get("errors", [])
-                j["frames"] = details.get("frames", {})
-    _save_jobs(jobs)
+    fields = {"status": status, "last_check": time.time()}
+    if details:
+        fields["progress"] = details.get("progress", 0)
+        fields["total_chunks"] = details.get("total_chunks", 0)
+        fields["errors"] = details.get("errors", [])
+        fields["frames"] = details.get("frames", {})
+    if job.get("batch_id"):
+        fields["batch_id"] = job["batch_id"]
+    get_registry().update(job.get("job_id"), fields)
 
 def find_job_by_id(job_id):
-    jobs = _load_jobs()
-    return next((job for job in jobs if job.get("job_id") == job_id), None)
+    return get_registry().get(job_id)
+
+def is_job_registered(job_id):
+    return get_registry().contains(job_id)
+
+def find_jobs(**criteria):
+    return get_registry().find(**criteria)
+
+def query_jobs(**options):
+    """
+    One page of jobs, see JobRegistry.query(). Returns (jobs, next_key, total).
+    """
+    return get_registry().query(**options)
+
+def get_jobs_version():
+    """
+    Changes whenever a job is added or removed.
+    """
+    return get_registry().version
+
+def flush_jobs():
+    get_registry().flush()
 
 def get_job_stats():
-    jobs = _load_jobs()
-    total = len(jobs)
-    if total == 0:
-        return {"total": 0, "by_status": {}}
-    stats = {"total": total, "by_status": {}}
-    for job in jobs:
-        status = job.get("status", "Unknown")
-        stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-    return stats
+    registry = get_registry()
+    return {"total": len(registry), "by_status": registry.count_by("status")}
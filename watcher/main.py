@@ -1,98 +1,329 @@
 # -*- coding: utf-8 -*-
 
+import sys
 import time
+import signal
 import threading
 import traceback
-from importlib import reload
-from watcher import handler
+from watcher import metrics, plugins, executor, batches
 from watcher.logger import setup_logger
 from watcher.monitor import DeadlineMonitor
 from watcher.config_loader import config
-from watcher.jobs import get_jobs_snapshot, remove_job, update_job_status
+from watcher.scheduler import PollScheduler, ProgressTracker
+from watcher.notify import ChangeListener
+from watcher.metrics import SnapshotWriter
+from watcher.jobs import get_registry, get_jobs_snapshot, get_jobs_version, retire_job, update_job_status
 
 logger = setup_logger()
 
-class JobWatcher(threading.Thread):
-    def __init__(self, job, interval=10):
-        super().__init__(daemon=True)
+class JobWatcher:
+    """
+    State of a single watched job. JobWatchManager polls Deadline for all due
+    jobs at once and feeds each result to handle().
+    """
+    def __init__(self, job, scheduler):
         self.job = job
         self.job_id = job.get("job_id")
-        self.interval = interval
-        self.monitor = DeadlineMonitor()
-        self._stop_event = threading.Event()
+        self.scheduler = scheduler
+        self.progress = ProgressTracker()
+        self.next_poll = 0.0
+        self.finished = False
+        # Upstream job ids, given at registration and/or read from the job's Deadline document.
+        self.dependencies = set(job.get("dependencies") or [])
+        self.parked = False
+        logger.info(f"[JobWatcher] Watching job: {self.job_id} (plugin: {self.job.get('plugin', 'Unknown')})")
 
-    def run(self):
-        logger.info(f"[JobWatcher] Wathching job: {self.job_id} (plugin: {self.job.get('plugin', 'Unknown')})")
-        while not self._stop_event.is_set():
-            try:
-                job_details = self.monitor.get_job_details(self.job_id)
-                status = job_details["status"]
-
-                if status == "Error":
-                    logger.warning(f"[JobWatcher] Job {self.job_id} removed/deleted from Deadline.")
-                    remove_job(self.job)
-                    break
-
-                if job_details["total_chunks"] > 0:
-                    progress_pct = (job_details["progress"] / job_details["total_chunks"]) * 100
-                    logger.debug(f"{self.job_id} Status: {status} ({progress_pct:.1f}%)")
-                else:
-                    logger.debug(f"{self.job_id} Status: {status}")
-
-                if get_jobs_snapshot() and any(j.get("job_id") == self.job_id for j in get_jobs_snapshot()):
-                    update_job_status(self.job, status, job_details)
-
-                if self.monitor.is_job_completed(status):
-                    logger.info(f"[COMPLETE] {self.job_id}. Running post-processing...")
-                    reload(handler)
-                    handler.handle_completed_job(self.job)
-                    remove_job(self.job)
-                    break
-
-                elif self.monitor.is_job_failed(status):
-                    logger.warning(f"[FAILED] {self.job_id}. Job failed with errors: {job_details.get('errors', [])}")
-                    remove_job(self.job)
-                    break
+    def is_due(self, now):
+        return not self.finished and now >= self.next_poll
 
-            except Exception as e:
-                logger.error(f"[JobWatcher] Traceback for job {self.job_id}: {e}")
-                traceback.print_exc()
+    def retry_later(self, now):
+        self.next_poll = now + config.retry_delay
+
+    def park(self, now):
+        """
+        Stop polling while an upstream job is still being watched; the manager
+        wakes the job when that finishes. Polled every dependency_check_interval_sec
+        meanwhile in case the upstream job is changed outside the watcher.
+        """
+        self.parked = True
+        self.next_poll = now + config.dependency_check_interval
+
+    def wake(self, now):
+        self.parked = False
+        self.next_poll = now
+
+    def learn(self, job_details):
+        """
+        Pick up the job's Deadline dependencies and batch from a poll result.
+        A newly learned batch is registered right away, so members polled in the
+        same cycle see each other before any of them is handled.
+        """
+        self.dependencies.update(job_details.get("dependencies") or [])
+        if not self.job.get("batch_id") and config.batch_by_name and job_details.get("batch"):
+            self.job["batch_id"] = job_details["batch"]
+            get_registry().update(self.job_id, {"batch_id": self.job["batch_id"]})
+
+    def handle(self, job_details, monitor, now):
+        """
+        Apply one poll result (after learn()). Returns True once the job no longer needs watching.
+        """
+        status = job_details["status"]
+        self.progress.update(job_details, now)
+        self.next_poll = now + self.scheduler.next_interval(status, job_details, self.progress)
+
+        if status == "Error":
+            logger.warning(f"[JobWatcher] Job {self.job_id} removed/deleted from Deadline.")
+            if self.job.get("batch_id"):
+                update_job_status(self.job, status)
+                batches.member_finished(self.job)
+            else:
+                retire_job(self.job)
+            return self._finish()
+
+        if job_details["total_chunks"] > 0:
+            progress_pct = (job_details["progress"] / job_details["total_chunks"]) * 100
+            logger.debug(f"{self.job_id} Status: {status} ({progress_pct:.1f}%)")
+        else:
+            logger.debug(f"{self.job_id} Status: {status}")
 
-            time.sleep(self.interval)
+        update_job_status(self.job, status, job_details)
 
-    def stop(self):
-        self._stop_event.set()
+        if monitor.is_job_completed(status):
+            logger.info(f"[COMPLETE] {self.job_id}. Running post-processing...")
+            if job_details.get("completed_at"):
+                metrics.COMPLETION_LAG_SECONDS.observe(max(0.0, time.time() - job_details["completed_at"]))
+            if self.job.get("batch_id"):
+                # Post-processed once, with the rest of its batch.
+                batches.member_finished(self.job)
+            else:
+                # Post-processing may block (players, network folders), so keep it off the poll thread.
+                executor.submit("complete", self._complete)
+            return self._finish()
+
+        elif monitor.is_job_failed(status):
+            logger.warning(f"[FAILED] {self.job_id}. Job failed with errors: {job_details.get('errors', [])}")
+            if self.job.get("batch_id"):
+                batches.member_finished(self.job)
+            else:
+                retire_job(self.job)
+            return self._finish()
+
+        return False
+
+    def _complete(self):
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            plugins.handle_completed_job(self.job)
+        except Exception as e:
+            result = "error"
+            logger.error(f"[JobWatcher] Post-processing failed for job {self.job_id}: {e}")
+            traceback.print_exc()
+        finally:
+            metrics.POSTPROCESS_SECONDS.observe(time.perf_counter() - start,
+                                                plugin=str(self.job.get("plugin", "Unknown")).lower(), result=result)
+            retire_job(self.job)
+
+    def _finish(self):
+        self.finished = True
+        return True
 
 
 class JobWatchManager:
-    def __init__(self, interval=None):
+    def __init__(self, interval=None, batch_size=None, monitor=None):
         self.interval = interval or config.check_interval
+        self.scheduler = PollScheduler(self.interval)
+        self.batch_size = batch_size or config.max_jobs_per_request
+        # Jobs due within this many seconds are polled along with the ones already
+        # due, so jittered jobs still share batched requests.
+        self.batch_window = self.scheduler.min_interval / 2
+        self.monitor = monitor or DeadlineMonitor()
         self.watchers = {}
+        self.dependents = {}  # upstream job id -> ids of watched jobs depending on it
         self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self._jobs_version = None
+        metrics.WATCHED_JOBS.set_function(self.watched_count)
+        metrics.PARKED_JOBS.set_function(self.parked_count)
+
+    def sync_jobs(self):
+        """
+        Add watchers for newly registered jobs and drop the ones no longer registered.
+        Does nothing unless a job was added or removed since the last call.
+        """
+        version = get_jobs_version()
+        if version == self._jobs_version:
+            return
+        self._jobs_version = version
+        jobs = get_jobs_snapshot() or []
+        registered = set()
+        now = time.time()
+        removed = []
+        with self.lock:
+            added = []
+            for job in jobs:
+                job_id = job.get("job_id")
+                registered.add(job_id)
+                # Retired jobs have finished and only wait for removal.
+                if job_id not in self.watchers and job.get("expires_at") is None:
+                    watcher = self.watchers[job_id] = JobWatcher(job, self.scheduler)
+                    added.append(watcher)
+            for job_id in list(self.watchers.keys()):
+                if job_id not in registered:
+                    watcher = self.watchers.pop(job_id)
+                    self._unlink(watcher)
+                    self._wake_dependents(job_id, now)
+                    removed.append(watcher)
+            # New jobs are polled once (in the same batched request) to read their
+            # batch and Deadline dependencies, and parked after that if blocked.
+            # dispatch() learns the batches of all results before handling any.
+            # Jobs registered with their dependencies are parked right away, unless
+            # their batch still has to be read from Deadline.
+            for watcher in added:
+                self._link(watcher)
+            for watcher in added:
+                if config.batch_by_name and not watcher.job.get("batch_id"):
+                    continue
+                if watcher.dependencies and self._blocked(watcher):
+                    watcher.park(now)
+        # A batch waiting on a member that was unregistered before finishing is checked again.
+        for watcher in removed:
+            if not watcher.finished and watcher.job.get("batch_id"):
+                batches.member_removed(watcher.job)
+
+    def poll_due_jobs(self):
+        """
+        Fetch every due job in batched GetJobStatuses requests and dispatch the results.
+        """
+        now = time.time()
+        due = self.due_watchers(now)
+        if not due:
+            return
+        with metrics.POLL_CYCLE_SECONDS.time():
+            results = self.monitor.get_jobs_details([w.job_id for w in due], self.batch_size)
+            self.dispatch(due, results, now)
+
+    def watched_count(self):
+        with self.lock:
+            return sum(1 for w in self.watchers.values() if not w.finished)
+
+    def parked_count(self):
+        with self.lock:
+            return sum(1 for w in self.watchers.values() if w.parked and not w.finished)
+
+    def due_watchers(self, now):
+        with self.lock:
+            return [w for w in self.watchers.values() if w.is_due(now + self.batch_window)]
+
+    def seconds_until_due(self, now):
+        """
+        Time until the next watcher is due, capped at max_check_interval_sec.
+        """
+        with self.lock:
+            next_polls = [w.next_poll for w in self.watchers.values() if not w.finished]
+        if not next_polls:
+            return config.max_check_interval
+        return min(max(min(next_polls) - now, 0), config.max_check_interval)
+
+    def on_jobs_changed(self):
+        """
+        Called when the API reports added/removed jobs: reload the registry and wake the loop.
+        """
+        get_registry().sync()
+        self.wakeup.set()
+
+    def dispatch(self, due, results, now):
+        logger.debug(f"[JobWatchManager] Polled {len(due)} jobs, {len(results)} results")
+        metrics.POLLED_JOBS.inc(len(due))
+        # A finished member checks whether the rest of its batch has finished, so
+        # every member in this cycle must be known to be in the batch first.
+        for watcher in due:
+            if watcher.job_id in results:
+                watcher.learn(results[watcher.job_id])
+        for watcher in due:
+            job_details = results.get(watcher.job_id)
+            if job_details is None:
+                watcher.retry_later(now)
+                continue
+            # Finished watchers stay registered until their job is unregistered,
+            # so sync_jobs() does not pick the job up again in the meantime.
+            try:
+                watcher.handle(job_details, self.monitor, now)
+            except Exception as e:
+                logger.error(f"[JobWatcher] Traceback for job {watcher.job_id}: {e}")
+                traceback.print_exc()
+            with self.lock:
+                self._after_poll(watcher, job_details["status"], now)
+
+    def _after_poll(self, watcher, status, now):
+        """
+        Only the frontier of a dependency chain is polled: a Pending job whose
+        upstream job is still watched is parked, and finishing a job wakes the
+        jobs parked on it.
+        """
+        if watcher.finished:
+            self._wake_dependents(watcher.job_id, now)
+            return
+        watcher.parked = False
+        self._link(watcher)
+        if status != "Pending" or not watcher.dependencies:
+            return
+        if self._blocked(watcher):
+            watcher.park(now)
+        else:
+            # Dependencies are done; Deadline releases the job on its next pending job scan.
+            watcher.next_poll = min(watcher.next_poll, now + self.scheduler.base_interval)
+
+    def _blocked(self, watcher):
+        for job_id in watcher.dependencies:
+            upstream = self.watchers.get(job_id)
+            if upstream is not None and not upstream.finished:
+                return True
+        return False
+
+    def _link(self, watcher):
+        for job_id in watcher.dependencies:
+            self.dependents.setdefault(job_id, set()).add(watcher.job_id)
+
+    def _unlink(self, watcher):
+        for job_id in watcher.dependencies:
+            dependents = self.dependents.get(job_id)
+            if dependents is not None:
+                dependents.discard(watcher.job_id)
+                if not dependents:
+                    del self.dependents[job_id]
+
+    def _wake_dependents(self, job_id, now):
+        for dependent_id in self.dependents.pop(job_id, ()):
+            dependent = self.watchers.get(dependent_id)
+            if dependent is not None and dependent.parked and not self._blocked(dependent):
+                logger.info(f"[JobWatchManager] {job_id} finished, waking dependent job {dependent_id}")
+                dependent.wake(now)
 
     def start_watching(self):
         logger.info("[JobWatchManager] Starting job watch manager")
         while True:
-            jobs = get_jobs_snapshot()
-            with self.lock:
-                if not jobs:
-                    for watcher in self.watchers.values():
-                        watcher.stop()
-                    self.watchers.clear()
-                    time.sleep(1)
-                    continue
-                for job in jobs:
-                    job_id = job.get("job_id")
-                    if job_id not in self.watchers:
-                        watcher = JobWatcher(job, interval=self.interval)
-                        self.watchers[job_id] = watcher
-                        watcher.start()
-                for job_id in list(self.watchers.keys()):
-                    if not any(j.get("job_id") == job_id for j in jobs):
-                        watcher = self.watchers.pop(job_id)
-                        watcher.stop()
-            time.sleep(1)
+            try:
+                self.sync_jobs()
+                self.poll_due_jobs()
+            except Exception as e:
+                logger.error(f"[JobWatchManager] Poll cycle failed: {e}")
+                traceback.print_exc()
+            # Sleep until the next job is due or the API reports a change.
+            self.wakeup.wait(min(self.seconds_until_due(time.time()), config.notify_fallback_interval))
+            self.wakeup.clear()
 
 def run_watcher():
+    # Exit through sys.exit on terminate so the job registry flushes pending writes.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Job changes from the API arrive as notifications; the store itself is only
+    # re-checked every notify_fallback_sec in case one is lost.
+    get_registry().sync_interval = config.notify_fallback_interval
     manager = JobWatchManager()
+    SnapshotWriter().start()
+    try:
+        ChangeListener(manager.on_jobs_changed).start()
+    except OSError as e:
+        logger.warning(f"[JobWatchManager] Change notifications unavailable, polling the job store: {e}")
+        get_registry().sync_interval = config.flush_interval
     manager.start_watching()
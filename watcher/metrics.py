@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import bisect
+import threading
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+
+    def collect(self):
+        """
+        Current value of every metric as JSON-serialisable families:
+            {"name", "type", "help", "labelnames", "samples": [[label values, value], ...]}
+        """
+        with self.lock:
+            metrics = list(self.metrics)
+        families = []
+        for metric in metrics:
+            try:
+                families.append(metric.collect())
+            except Exception as e:
+                logger.error(f"[METRICS] Failed to collect {metric.name}: {e}")
+        return families
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _ShardedMetric:
+    """
+    Metric aggregated per thread: each thread updates its own shard without
+    taking a lock, and collect() sums the shards. Shards of threads that have
+    ended are folded into one so short-lived threads do not pile up.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._retired = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _merge(self, target, shard):
+        raise NotImplementedError
+
+    def _merged(self):
+        merged = {}
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = live
+            self._merge(merged, self._retired)
+            for _, shard in live:
+                self._merge(merged, shard)
+        return merged
+
+    def collect(self):
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(key), value] for key, value in sorted(self._merged().items())],
+        }
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, target, shard):
+        # list() copies the items in one step, so the owning thread can keep writing.
+        for key, value in list(shard.items()):
+            target[key] = target.get(key, 0) + value
+
+
+class Histogram(_ShardedMetric):
+    """
+    Samples are {"buckets": [non-cumulative counts per bucket, +Inf last], "sum": total}.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def _merge(self, target, shard):
+        for key, counts in list(shard.items()):
+            counts = list(counts)
+            total = target.get(key)
+            target[key] = counts if total is None else [a + b for a, b in zip(total, counts)]
+
+    def collect(self):
+        family = super().collect()
+        family["buckets"] = list(self.buckets)
+        family["samples"] = [[labels, {"buckets": counts[:-1], "sum": counts[-1]}]
+                             for labels, counts in family["samples"]]
+        return family
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Gauge:
+    """
+    Metric read from a function at collection time. The function returns a number,
+    or a dict of label value tuples to numbers. kind may be "counter" for values
+    that are counted elsewhere (e.g. the Deadline request cache).
+    """
+    def __init__(self, name, documentation, labelnames=(), kind="gauge", registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self.function = None
+        registry.register(self)
+
+    def set_function(self, function):
+        self.function = function
+
+    def collect(self):
+        values = self.function() if self.function is not None else {}
+        if not isinstance(values, dict):
+            values = {(): values}
+        samples = []
+        for key, value in sorted(values.items(), key=lambda item: str(item[0])):
+            key = key if isinstance(key, tuple) else (key,)
+            samples.append([[str(part) for part in key], value])
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+
+# ---- metrics ----
+
+DEADLINE_REQUESTS = Counter(
+    "deadline_requests_total", "Deadline Web Service requests.", ("method", "endpoint", "status"))
+DEADLINE_REQUEST_SECONDS = Histogram(
+    "deadline_request_duration_seconds", "Deadline Web Service request latency.", ("method", "endpoint"))
+DEADLINE_CACHE = Gauge(
+    "deadline_cache_lookups_total", "Deadline GET lookups by request cache outcome.", ("result",), kind="counter")
+
+POLL_CYCLE_SECONDS = Histogram(
+    "watcher_poll_cycle_duration_seconds", "Time to fetch and dispatch one round of due jobs.")
+POLLED_JOBS = Counter("watcher_polled_jobs_total", "Job status checks made by the watcher.")
+WATCHED_JOBS = Gauge("watcher_watched_jobs", "Jobs the watcher is currently polling.")
+PARKED_JOBS = Gauge("watcher_parked_jobs", "Watched jobs waiting on an upstream job instead of being polled.")
+COMPLETION_LAG_SECONDS = Histogram(
+    "watcher_completion_lag_seconds", "Time from Deadline completing a job to the watcher noticing.",
+    buckets=LAG_BUCKETS)
+JOBS_BY_STATUS = Gauge("registered_jobs", "Registered jobs by last known status.", ("status",))
+
+STORE_SECONDS = Histogram(
+    "job_store_operation_duration_seconds", "Job store read/write latency.", ("operation",))
+
+CALLBACK_SECONDS = Histogram(
+    "callback_delivery_duration_seconds", "Completion callback delivery latency.")
+CALLBACKS = Counter("callback_deliveries_total", "Completion callback delivery attempts by result.", ("result",))
+CALLBACK_OUTBOX = Gauge("callback_outbox", "Callbacks in the outbox by state (pending, dead).", ("state",))
+POSTPROCESS_ACTIONS = Counter(
+    "postprocess_actions_total", "Post-processing actions by result (ok, error, deduplicated).", ("action", "result"))
+POSTPROCESS_QUEUE = Gauge("postprocess_queue", "Post-processing actions waiting for a worker.", ("action",))
+STREAM_SUBSCRIBERS = Gauge("stream_subscribers", "Connected job event stream clients (SSE and WebSocket).")
+STREAM_DROPPED = Counter("stream_events_dropped_total", "Job events dropped because a stream client fell behind.")
+POSTPROCESS_SECONDS = Histogram(
+    "postprocess_duration_seconds", "Post-processing duration of completed jobs.", ("plugin", "result"),
+    buckets=DEFAULT_BUCKETS + (120.0, 300.0))
+
+
+def observe_deadline_request(method, endpoint, status, seconds):
+    """
+    Request hook for Deadline/DeadlineSend.py. status is None if no response was received.
+    """
+    DEADLINE_REQUESTS.inc(method=method, endpoint=endpoint, status=status if status is not None else "error")
+    DEADLINE_REQUEST_SECONDS.observe(seconds, method=method, endpoint=endpoint)
+
+
+# ---- exposition ----
+
+def render_metrics():
+    """
+    Prometheus text exposition of this process's metrics, labelled process="api",
+    plus the watcher process's last snapshot (process="watcher") in split mode.
+    """
+    sources = [("api", REGISTRY.collect())]
+    if config.mode != "single":
+        snapshot = read_snapshot()
+        if snapshot is not None:
+            age = Gauge("metrics_snapshot_age_seconds", "Seconds since the watcher's metrics last changed.",
+                        registry=MetricsRegistry())
+            age.set_function(lambda: round(time.time() - snapshot["written_at"], 3))
+            sources.append(("watcher", snapshot["families"] + [age.collect()]))
+    return format_families(sources)
+
+
+def format_families(sources):
+    """
+    sources: [(process label, families)]. Families of the same name from several
+    processes are written as one metric family.
+    """
+    grouped = {}
+    for process, families in sources:
+        for family in families:
+            grouped.setdefault(family["name"], (family, []))[1].append((process, family))
+
+    lines = []
+    for name, (first, members) in grouped.items():
+        lines.append(f"# HELP {name} {first['help']}")
+        lines.append(f"# TYPE {name} {first['type']}")
+        for process, family in members:
+            labelnames = ["process"] + family["labelnames"]
+            for label_values, value in family["samples"]:
+                labels = list(zip(labelnames, [process] + label_values))
+                if family["type"] == "histogram":
+                    lines.extend(_histogram_lines(name, labels, family["buckets"], value))
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _histogram_lines(name, labels, buckets, value):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(list(buckets) + ["+Inf"], value["buckets"]):
+        cumulative += count
+        le = bound if bound == "+Inf" else _number(bound)
+        lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return lines
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+# ---- watcher process snapshot ----
+
+def write_snapshot(path=None, families=None):
+    path = path or config.metrics_file
+    families = REGISTRY.collect() if families is None else families
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"written_at": time.time(), "pid": os.getpid(), "families": families}, f)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=None):
+    path = path or config.metrics_file
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"[METRICS] Failed to read watcher metrics snapshot: {e}")
+        return None
+
+
+class SnapshotWriter(threading.Thread):
+    """
+    Writes the watcher process's metrics to metrics_file every
+    metrics_interval_sec, for the API's /metrics endpoint to merge in.
+    Nothing is written while no value has changed, so an idle watcher does
+    not touch the disk.
+    """
+    def __init__(self, interval=None, path=None):
+        super().__init__(name="MetricsSnapshot", daemon=True)
+        self.interval = interval or config.metrics_interval
+        self.path = path or config.metrics_file
+        self.written = None
+
+    def run(self):
+        while True:
+            try:
+                families = REGISTRY.collect()
+                if families != self.written:
+                    write_snapshot(self.path, families)
+                    self.written = families
+            except Exception as e:
+                logger.error(f"[METRICS] Failed to write metrics snapshot: {e}")
+            time.sleep(self.interval)
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
+import time
+import calendar
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from watcher.logger import setup_logger
@@ -10,55 +13,113 @@ from watcher.deadline_connector import DeadlineConnector
 
 logger = setup_logger()
 
+DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?")
+
+STATUS_MAP = {
+    0: "Queued",
+    1: "Rendering",
+    2: "Suspended",
+    3: "Completed",
+    4: "Failed",
+    5: "Unknown",
+    6: "Pending"
+}
+
+def parse_deadline_date(value):
+    """
+    Epoch seconds of a Web Service date such as "2024-05-01T12:30:45.123Z" (UTC),
+    or None for empty/unset dates.
+    """
+    match = DATE_PATTERN.match(value or "")
+    if not match:
+        return None
+    timestamp = calendar.timegm(time.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S"))
+    if timestamp <= 0:
+        # Unset dates come back as 0001-01-01.
+        return None
+    return timestamp + float(match.group(2) or 0)
+
 class DeadlineMonitor:
     def __init__(self):
         self.con = DeadlineConnector().con
 
     def get_job_details(self, job_id):
-        STATUS_MAP = {
-            0: "Queued",
-            1: "Rendering",
-            2: "Suspended",
-            3: "Completed",
-            4: "Failed",
-            5: "Unknown",
-            6: "Pending"
+        return self.get_jobs_details([job_id]).get(job_id) or self._error_details(f"Failed to query job {job_id}")
+
+    def get_jobs_details(self, job_ids, chunk_size=None):
+        """
+        Fetch many jobs with one GetJobStatuses request per chunk of IDs.
+        Returns {job_id: details}. Jobs of a chunk whose request failed are left out
+        so the caller can retry them; jobs missing from a valid response get "Error".
+        """
+        results = {}
+        for chunk in self._chunks(job_ids, chunk_size):
+            try:
+                job_list = self.con.Jobs.GetJobStatuses(chunk)
+            except Exception as e:
+                logger.error(f"[MONITOR] GetJobStatuses failed for {len(chunk)} jobs: {e}")
+                continue
+            results.update(self._parse_chunk(chunk, job_list))
+        return results
+
+    def _chunks(self, job_ids, chunk_size=None):
+        chunk_size = chunk_size or config.max_jobs_per_request
+        job_ids = list(job_ids)
+        return [job_ids[i:i + chunk_size] for i in range(0, len(job_ids), chunk_size)]
+
+    def _parse_chunk(self, chunk, job_list):
+        """
+        job_list: list of JobStatus for the IDs in chunk.
+        """
+        if not isinstance(job_list, list):
+            logger.error(f"[MONITOR] Unexpected GetJobStatuses response for {len(chunk)} jobs: {job_list}")
+            return {}
+
+        found = {job_status.id: job_status for job_status in job_list if job_status.id}
+
+        results = {}
+        for job_id in chunk:
+            if job_id in found:
+                try:
+                    results[job_id] = self._parse_job_status(found[job_id])
+                except Exception as e:
+                    results[job_id] = self._error_details(e)
+            else:
+                results[job_id] = self._error_details(f"Job {job_id} not found in Deadline")
+        return results
+
+    def _parse_job_status(self, job_status):
+        status_str = STATUS_MAP.get(job_status.stat, "Unknown")
+
+        completed = job_status.completedChunks
+        total_chunks = completed + job_status.renderingChunks + job_status.queuedChunks
+
+        return {
+            "status": status_str,
+            "progress": completed,
+            "total_chunks": total_chunks,
+            "remaining_chunks": job_status.queuedChunks,
+            "errors": job_status.errors,
+            "render_time": job_status.renderTime,
+            "last_updated": job_status.date,
+            "completed_at": parse_deadline_date(job_status.completedDate),
+            "dependencies": job_status.dependencies,
+            "batch": job_status.batchName,
+            "frames": {
+                "completed": job_status.completedTasks,
+                "total": job_status.tasks,
+                "failed": job_status.failedTasks
+            }
         }
 
-        try:
-            job_data = self.con.Jobs.GetJob(job_id)
-
-            raw_status = job_data.get("Stat", 5)
-            status_str = STATUS_MAP.get(raw_status, "Unknown")
-
-            completed = job_data.get("CompletedChunks", 0)
-            rendering = job_data.get("RenderingChunks", 0)
-            queued = job_data.get("QueuedChunks", 0)
-
-            total_chunks = completed + rendering + queued
-
-            return {
-                "status": status_str,
-                "progress": completed,
-                "total_chunks": total_chunks,
-                "remaining_chunks": queued,
-                "errors": job_data.get("Errs", 0),
-                "render_time": job_data.get("Props", {}).get("JobRenderTime", 0),
-                "last_updated": job_data.get("Date", ""),
-                "frames": {
-                    "completed": job_data.get("Props", {}).get("JobCompletedTasks", 0),
-                    "total": job_data.get("Props", {}).get("Tasks", 0),
-                    "failed": job_data.get("Props", {}).get("JobFailedTasks", 0)
-                }
-            }
-        except Exception as e:
-            return {
-                "status": "Error",
-                "progress": 0,
-                "total_chunks": 0,
-                "remaining_chunks": 0,
-                "errors": [str(e)]
-            }
+    def _error_details(self, error):
+        return {
+            "status": "Error",
+            "progress": 0,
+            "total_chunks": 0,
+            "remaining_chunks": 0,
+            "errors": [str(error)]
+        }
 
     def is_job_completed(self, status):
         return status.lower() in ["completed"]
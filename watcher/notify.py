@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+
+MESSAGE = b"jobs-changed"
+
+class ChangeNotifier:
+    """
+    Tells the watcher process that jobs were added or removed, with a UDP
+    datagram on localhost. Best effort: the watcher also re-checks the job
+    store every notify_fallback_sec in case a datagram is lost.
+    """
+    def __init__(self, port=None):
+        self.address = ("127.0.0.1", port or config.notify_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def notify(self):
+        try:
+            self.sock.sendto(MESSAGE, self.address)
+        except OSError as e:
+            logger.debug(f"[NOTIFY] Failed to send change notification: {e}")
+
+    def on_flush(self, puts, deletes):
+        """
+        JobRegistry flush listener: only membership changes are worth a notification.
+        """
+        if puts or deletes:
+            self.notify()
+
+
+class ChangeListener(threading.Thread):
+    """
+    Receives ChangeNotifier datagrams and calls callback() for each.
+    """
+    def __init__(self, callback, port=None):
+        super().__init__(name="JobChangeListener", daemon=True)
+        self.callback = callback
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", port or config.notify_port))
+
+    def run(self):
+        while True:
+            try:
+                message, _ = self.sock.recvfrom(64)
+            except OSError as e:
+                logger.error(f"[NOTIFY] Change listener stopped: {e}")
+                return
+            if message != MESSAGE:
+                continue
+            try:
+                self.callback()
+            except Exception as e:
+                logger.error(f"[NOTIFY] Change callback failed: {e}")
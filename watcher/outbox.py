@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import queue
+import random
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from watcher import metrics
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+_outbox = None
+_outbox_lock = threading.Lock()
+
+# 4xx responses worth retrying; any other 4xx is dead-lettered right away.
+RETRYABLE_CLIENT_ERRORS = (408, 425, 429)
+
+
+class CallbackOutbox:
+    """
+    Durable queue of completion callbacks. enqueue() only writes a row to a
+    SQLite outbox and returns; a dispatcher thread hands due rows to a fixed
+    pool of delivery workers, at most per_destination at a time per host, each
+    host sharing one pooled requests.Session. Failed deliveries are retried
+    with exponential backoff and jitter, and after max_attempts (or on a
+    non-retryable 4xx) the row is kept as dead instead of deleted.
+
+    The dispatcher claims a row by moving it from pending to sending in one
+    UPDATE, so a row a worker has just delivered or rescheduled is never
+    handed out again from a stale read. Rows are removed only after a
+    successful delivery, so callbacks pending (or sending) at shutdown are
+    sent after the next start (at-least-once). One process should deliver
+    from a given outbox file.
+    """
+    def __init__(self, path=None, workers=None, per_destination=None, max_attempts=None,
+                 backoff=None, max_backoff=None, timeout=None):
+        self.path = path or config.callback_outbox_db
+        self.workers = workers or config.callback_workers
+        self.per_destination = per_destination or config.callback_per_destination
+        self.max_attempts = max_attempts or config.callback_max_attempts
+        self.backoff = backoff or config.callback_backoff
+        self.max_backoff = max_backoff or config.callback_max_backoff
+        self.timeout = timeout or config.callback_timeout
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS callbacks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_callbacks_due ON callbacks(state, next_attempt);
+            """
+        )
+        # Deliveries cut short by the last shutdown.
+        self.conn.execute("UPDATE callbacks SET state = 'pending' WHERE state = 'sending'")
+
+        self.tasks = queue.Queue()
+        self.wakeup = threading.Event()
+        self.in_flight = set()        # row ids handed to a worker
+        self.per_host = {}            # host -> deliveries in flight
+        self.sessions = {}            # host -> requests.Session
+        self.state_lock = threading.Lock()
+
+        threading.Thread(target=self._dispatch_loop, name="CallbackDispatcher", daemon=True).start()
+        for i in range(self.workers):
+            threading.Thread(target=self._worker_loop, name=f"CallbackWorker-{i}", daemon=True).start()
+
+    def enqueue(self, url, payload):
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO callbacks (url, payload, next_attempt, created_at) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    def counts(self):
+        """
+        Number of rows by state: pending, sending and dead.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM callbacks GROUP BY state").fetchall()
+        return {(state,): count for state, count in rows}
+
+    def dead_letters(self, limit=100):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, url, payload, attempts, last_error FROM callbacks WHERE state = 'dead' "
+                "ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"id": row[0], "url": row[1], "payload": json.loads(row[2]), "attempts": row[3],
+                 "last_error": row[4]} for row in rows]
+
+    def retry_dead(self):
+        """
+        Put every dead-lettered callback back in the queue.
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE callbacks SET state = 'pending', attempts = 0, next_attempt = ? WHERE state = 'dead'",
+                (time.time(),)
+            )
+        self.wakeup.set()
+        return cursor.rowcount
+
+    # ---- dispatch ----
+
+    def _dispatch_loop(self):
+        while True:
+            try:
+                wait = self._dispatch_due()
+            except Exception as e:
+                logger.error(f"[CALLBACK] Dispatch failed: {e}")
+                wait = self.backoff
+            self.wakeup.wait(wait)
+            self.wakeup.clear()
+
+    def _dispatch_due(self):
+        """
+        Hand due rows to the workers. Returns seconds until the next row is due.
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, url FROM callbacks WHERE state = 'pending' AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?", (now, self.workers * 4)
+            ).fetchall()
+            next_row = self.conn.execute(
+                "SELECT MIN(next_attempt) FROM callbacks WHERE state = 'pending' AND next_attempt > ?", (now,)
+            ).fetchone()
+
+        with self.state_lock:
+            for row_id, url in rows:
+                host = urlsplit(url).netloc
+                if len(self.in_flight) >= self.workers:
+                    break
+                if self.per_host.get(host, 0) >= self.per_destination:
+                    continue
+                claimed = self._claim(row_id, now)
+                if claimed is None:
+                    continue
+                self.in_flight.add(row_id)
+                self.per_host[host] = self.per_host.get(host, 0) + 1
+                self.tasks.put((row_id,) + claimed + (host,))
+
+        # Rows skipped above are picked up when a worker finishes and wakes the dispatcher.
+        if next_row and next_row[0] is not None:
+            return max(0.0, next_row[0] - now)
+        return None
+
+    def _claim(self, row_id, now):
+        """
+        Move a due row from pending to sending. Returns its (url, payload, attempts)
+        as of the claim, or None if a worker changed it since it was selected.
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE callbacks SET state = 'sending' WHERE id = ? AND state = 'pending' AND next_attempt <= ?",
+                (row_id, now)
+            )
+            if cursor.rowcount != 1:
+                return None
+            return self.conn.execute("SELECT url, payload, attempts FROM callbacks WHERE id = ?", (row_id,)).fetchone()
+
+    # ---- delivery ----
+
+    def _worker_loop(self):
+        while True:
+            row_id, url, payload, attempts, host = self.tasks.get()
+            try:
+                self._deliver(row_id, url, payload, attempts, host)
+            except Exception as e:
+                logger.error(f"[CALLBACK] Delivery of callback {row_id} failed unexpectedly: {e}")
+                try:
+                    # Release the claim so the row is retried instead of staying in sending.
+                    self._failed(row_id, url, attempts + 1, str(e), False)
+                except Exception as e:
+                    logger.error(f"[CALLBACK] Failed to reschedule callback {row_id}: {e}")
+            finally:
+                with self.state_lock:
+                    self.in_flight.discard(row_id)
+                    self.per_host[host] -= 1
+                    if not self.per_host[host]:
+                        del self.per_host[host]
+                self.wakeup.set()
+
+    def _deliver(self, row_id, url, payload, attempts, host):
+        start = time.perf_counter()
+        status = None
+        try:
+            response = self._session(host).post(
+                url, data=payload.encode("utf-8"), timeout=self.timeout,
+                headers={"Content-Type": "application/json"}
+            )
+            status = response.status_code
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            metrics.CALLBACK_SECONDS.observe(time.perf_counter() - start)
+            permanent = status is not None and 400 <= status < 500 and status not in RETRYABLE_CLIENT_ERRORS
+            self._failed(row_id, url, attempts + 1, str(e), permanent)
+            return
+        metrics.CALLBACK_SECONDS.observe(time.perf_counter() - start)
+        metrics.CALLBACKS.inc(result="success")
+        with self.lock:
+            self.conn.execute("DELETE FROM callbacks WHERE id = ?", (row_id,))
+        logger.info(f"[CALLBACK] Successfully sent callback {row_id} to {url}")
+
+    def _failed(self, row_id, url, attempts, error, permanent):
+        if permanent or attempts >= self.max_attempts:
+            metrics.CALLBACKS.inc(result="dead")
+            with self.lock:
+                self.conn.execute(
+                    "UPDATE callbacks SET state = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, row_id)
+                )
+            logger.error(f"[CALLBACK] Giving up on callback {row_id} to {url} after {attempts} attempts: {error}")
+            return
+
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+        metrics.CALLBACKS.inc(result="retry")
+        with self.lock:
+            self.conn.execute(
+                "UPDATE callbacks SET state = 'pending', attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, row_id)
+            )
+        logger.warning(f"[CALLBACK] Callback {row_id} to {url} failed (attempt {attempts}), retrying in {delay:.1f}s: {error}")
+
+    def _session(self, host):
+        with self.state_lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_destination)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[host] = session
+            return session
+
+
+def get_outbox():
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = CallbackOutbox()
+                metrics.CALLBACK_OUTBOX.set_function(_outbox.counts)
+    return _outbox
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import glob
+import time
+import threading
+import traceback
+import importlib
+import importlib.util
+from watcher import handler
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+_registry = None
+_registry_lock = threading.Lock()
+
+# Plugin files are stat'ed at most this often, so a burst of completions costs one check.
+RELOAD_CHECK_INTERVAL = 2.0
+PLUGIN_MODULE_PREFIX = "deadline_watcher_plugins."
+
+
+class PostProcessorRegistry:
+    """
+    Post-processors for completed jobs, by Deadline plugin name.
+
+    watcher/handler.py provides the built-in post-processing. Every *.py file in
+    plugin_dir can add or override post-processors:
+
+        PLUGINS = ["nuke", "nuke13"]      # Deadline plugin names (case-insensitive)
+
+        def postprocess(job):
+            ...
+
+    Modules are loaded once and reloaded only when their file's mtime changes
+    (or files are added/removed), checked at most every RELOAD_CHECK_INTERVAL.
+    A plugin that fails to load keeps its previous version.
+    """
+    def __init__(self, plugin_dir=None):
+        self.plugin_dir = os.path.expanduser(plugin_dir or config.plugin_dir)
+        self.lock = threading.Lock()
+        self.modules = {}          # path -> (mtime, module)
+        self.postprocessors = {}   # plugin name -> postprocess(job)
+        self.handler_mtime = _mtime(handler.__file__)
+        self._last_check = 0.0
+        self._scan()
+
+    def refresh(self, force=False):
+        """
+        Reload handler.py and plugin files whose mtime changed. Returns True if anything was reloaded.
+        """
+        now = time.time()
+        with self.lock:
+            if not force and now - self._last_check < RELOAD_CHECK_INTERVAL:
+                return False
+            self._last_check = now
+            reloaded = self._reload_handler()
+            return self._scan() or reloaded
+
+    def find(self, plugin):
+        with self.lock:
+            return self.postprocessors.get((plugin or "").lower())
+
+    def handle_completed_job(self, job):
+        self.refresh()
+        with self.lock:
+            postprocessors = dict(self.postprocessors)
+        handler.handle_completed_job(job, postprocessors)
+
+    def handle_completed_batch(self, batch_id, jobs):
+        self.refresh()
+        with self.lock:
+            postprocessors = dict(self.postprocessors)
+        handler.handle_completed_batch(batch_id, jobs, postprocessors)
+
+    def handle_failed_batch(self, batch_id, jobs, failed):
+        self.refresh()
+        handler.handle_failed_batch(batch_id, jobs, failed)
+
+    def _reload_handler(self):
+        mtime = _mtime(handler.__file__)
+        if mtime == self.handler_mtime:
+            return False
+        self.handler_mtime = mtime
+        try:
+            importlib.reload(handler)
+            logger.info(f"[PLUGINS] Reloaded {handler.__file__}")
+            return True
+        except Exception as e:
+            logger.error(f"[PLUGINS] Failed to reload {handler.__file__}, keeping the previous version: {e}")
+            traceback.print_exc()
+            return False
+
+    def _scan(self):
+        paths = sorted(glob.glob(os.path.join(self.plugin_dir, "*.py"))) if os.path.isdir(self.plugin_dir) else []
+        changed = False
+        for path in set(self.modules) - set(paths):
+            logger.info(f"[PLUGINS] Plugin removed: {path}")
+            del self.modules[path]
+            sys.modules.pop(_module_name(path), None)
+            changed = True
+        for path in paths:
+            mtime = _mtime(path)
+            loaded = self.modules.get(path)
+            if loaded is not None and loaded[0] == mtime:
+                continue
+            module = self._load(path)
+            # Remember the mtime even on failure so a broken file is not retried until it changes.
+            self.modules[path] = (mtime, module if module is not None else (loaded[1] if loaded else None))
+            changed = True
+        if changed:
+            self._rebuild()
+        return changed
+
+    def _load(self, path):
+        name = _module_name(path)
+        try:
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            logger.error(f"[PLUGINS] Failed to load {path}: {e}")
+            traceback.print_exc()
+            return None
+        if not callable(getattr(module, "postprocess", None)):
+            logger.error(f"[PLUGINS] {path} has no postprocess(job) function")
+            return None
+        sys.modules[name] = module
+        logger.info(f"[PLUGINS] Loaded {path} for {list(getattr(module, 'PLUGINS', []))}")
+        return module
+
+    def _rebuild(self):
+        postprocessors = {}
+        for path, (mtime, module) in sorted(self.modules.items()):
+            if module is None:
+                continue
+            for plugin in getattr(module, "PLUGINS", []):
+                postprocessors[str(plugin).lower()] = module.postprocess
+        self.postprocessors = postprocessors
+
+
+def _module_name(path):
+    return PLUGIN_MODULE_PREFIX + os.path.splitext(os.path.basename(path))[0]
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_plugin_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PostProcessorRegistry()
+    return _registry
+
+def handle_completed_job(job):
+    get_plugin_registry().handle_completed_job(job)
+
+def handle_completed_batch(batch_id, jobs):
+    get_plugin_registry().handle_completed_batch(batch_id, jobs)
+
+def handle_failed_batch(batch_id, jobs, failed):
+    get_plugin_registry().handle_failed_batch(batch_id, jobs, failed)
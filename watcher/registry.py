@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import time
+import atexit
+import uuid
+import bisect
+import threading
+import traceback
+from collections import OrderedDict
+from watcher import metrics
+from watcher.config_loader import config
+from watcher.logger import setup_logger
+
+logger = setup_logger()
+
+INDEXED_FIELDS = ("status", "plugin", "user", "batch_id")
+# Fields rewritten on every poll; changing only these does not make a new revision.
+VOLATILE_FIELDS = ("last_check",)
+
+class JobRegistry:
+    """
+    In-memory view of the registered jobs, indexed by job_id, by the
+    INDEXED_FIELDS and in (registered_at, job_id) and (job_name, job_id)
+    order for query(). Reads never touch the store. Writes mark entries dirty and a
+    background thread flushes them to the store in one batch every
+    flush_interval seconds (and on exit), and every sync_interval seconds
+    picks up changes made by the other process: only the changed entries when
+    the store keeps a change log (SQLite), otherwise by reloading everything.
+    Updates to VOLATILE_FIELDS alone do not make an entry dirty; they reach the
+    store with the job's next real change.
+
+    version changes whenever a job is added or removed, so callers can skip
+    reconciling when the set of jobs is unchanged. Change listeners see every
+    added, updated and removed job, including changes picked up by sync().
+
+    Finished jobs can be retired instead of removed: they stay readable with
+    their final status until their expires_at time, then the flush thread
+    removes them.
+
+    Every change other than to VOLATILE_FIELDS gets the next revision number
+    (per process; epoch identifies the process). The revision of each job and
+    of the collection, plus the last revision_history removals, let the API
+    answer conditional and "changed since" requests.
+    """
+    def __init__(self, store, flush_interval=None, sync_interval=None):
+        self.store = store
+        self.flush_interval = flush_interval or config.flush_interval
+        self.sync_interval = sync_interval or self.flush_interval
+        self.lock = threading.RLock()
+        self.jobs = {}
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.order = []  # sorted (registered_at, job_id)
+        self.names = []  # sorted (job_name, job_id)
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self.revision = 0
+        self.modified_at = time.time()
+        self.revision_history = config.revision_history
+        self._revisions = OrderedDict()   # job_id -> (revision, modified_at), oldest change first
+        self._tombstones = OrderedDict()  # removed job_id -> revision, oldest first
+        self._tombstone_floor = 0         # removals at or below this revision are forgotten
+        self._dirty = {}  # job_id -> "put" | "update" | "delete"
+        self._flush_listeners = []
+        self._change_listeners = []
+        self._expiring = {}  # job_id -> expires_at
+        self._store_token = None
+        self._store_cursor = None
+        self._last_sync = 0.0
+        self._io_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self._reload(self.store.change_token())
+        self._thread = threading.Thread(target=self._flush_loop, name="JobRegistryFlush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- reads ----
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def contains(self, job_id):
+        with self.lock:
+            return job_id in self.jobs
+
+    def all(self):
+        with self.lock:
+            return [copy.deepcopy(job) for job in self.jobs.values()]
+
+    def find(self, **criteria):
+        """
+        Jobs matching every given indexed field, e.g. find(status="Rendering", plugin="Nuke").
+        """
+        with self.lock:
+            job_ids = None
+            for field, value in criteria.items():
+                matches = self.indexes[field].get(value, set())
+                job_ids = set(matches) if job_ids is None else job_ids & matches
+            if job_ids is None:
+                return self.all()
+            return [copy.deepcopy(self.jobs[job_id]) for job_id in self.jobs if job_id in job_ids]
+
+    def query(self, criteria=None, registered_after=None, registered_before=None, name_prefix=None,
+              after=None, limit=100, fields=None):
+        """
+        One page of jobs in (registered_at, job_id) order.
+
+        criteria: indexed field -> value, as in find(). registered_after /
+        registered_before bound registered_at (inclusive). name_prefix matches
+        job_name. after: the (registered_at, job_id) key of the last job of the
+        previous page. fields: keys to return per job (all if None).
+
+        Returns (jobs, next_key, total): next_key is None on the last page and
+        total counts every match, not only this page.
+        """
+        start_key = (registered_after if registered_after is not None else float("-inf"), "")
+        high = (registered_before if registered_before is not None else float("inf"), "\uffff")
+        low = start_key if after is None else max(start_key, (after[0], after[1] + "\0"))
+        with self.lock:
+            candidates = None  # read-only while the lock is held, so an index set is used as is
+            for field, value in (criteria or {}).items():
+                matches = self.indexes[field].get(value, set())
+                candidates = matches if candidates is None else candidates & matches
+            if name_prefix:
+                start = bisect.bisect_left(self.names, (name_prefix, ""))
+                end = bisect.bisect_left(self.names, (name_prefix + "\uffff", ""))
+                matches = {job_id for _, job_id in self.names[start:end]}
+                candidates = matches if candidates is None else candidates & matches
+
+            if candidates is None:
+                # No set filter: the page is a slice of the registration order.
+                first = bisect.bisect_left(self.order, low)
+                last = bisect.bisect_right(self.order, high)
+                keys = self.order[first:min(last, first + limit + 1)]
+                total = last - bisect.bisect_left(self.order, start_key)
+            elif len(candidates) ** 2 > (limit + 1) * len(self.order):
+                # Common matches: walk the registration order until the page is full.
+                keys = []
+                for key in self.order[bisect.bisect_left(self.order, low):]:
+                    if key > high or len(keys) > limit:
+                        break
+                    if key[1] in candidates:
+                        keys.append(key)
+                total = self._count_in_range(candidates, start_key, high, registered_after, registered_before)
+            else:
+                # Few matches: sort just those.
+                matched = sorted(key for key in map(self._order_key, (self.jobs[job_id] for job_id in candidates))
+                                 if start_key <= key <= high)
+                total = len(matched)
+                first = bisect.bisect_left(matched, low)
+                keys = matched[first:first + limit + 1]
+
+            page = [self._project(self.jobs[job_id], fields) for _, job_id in keys[:limit]]
+            next_key = keys[limit - 1] if len(keys) > limit and limit > 0 else None
+        return page, next_key, total
+
+    def job_revision(self, job_id):
+        """
+        (revision, modified_at) of a registered job, or None.
+        """
+        with self.lock:
+            return self._revisions.get(job_id)
+
+    def collection_revision(self):
+        """
+        (revision, modified_at) of the whole collection.
+        """
+        with self.lock:
+            return self.revision, self.modified_at
+
+    def changes_since(self, revision, fields=None):
+        """
+        Jobs changed and job_ids removed after revision, plus the current revision.
+        Returns None if removals that old are no longer remembered, or if revision
+        is ahead of this registry (it came from before a restart).
+        """
+        with self.lock:
+            if revision < self._tombstone_floor or revision > self.revision:
+                return None
+            changed = []
+            for job_id in reversed(self._revisions):
+                if self._revisions[job_id][0] <= revision:
+                    break
+                changed.append(self._project(self.jobs[job_id], fields))
+            removed = []
+            for job_id in reversed(self._tombstones):
+                if self._tombstones[job_id] <= revision:
+                    break
+                removed.append(job_id)
+            changed.reverse()
+            removed.reverse()
+            return changed, removed, self.revision
+
+    def count_by(self, field):
+        with self.lock:
+            return {value: len(job_ids) for value, job_ids in self.indexes[field].items() if job_ids}
+
+    def __len__(self):
+        with self.lock:
+            return len(self.jobs)
+
+    # ---- writes ----
+
+    def add(self, job):
+        job = copy.deepcopy(job)
+        job_id = job.get("job_id")
+        with self.lock:
+            if job_id in self.jobs:
+                self._unindex(self.jobs[job_id])
+                self._unsort(self.jobs[job_id])
+            else:
+                self.version += 1
+            self.jobs[job_id] = job
+            self._index(job)
+            self._sort(job)
+            self._touch(job_id)
+            self._dirty[job_id] = "put"
+            changes = self._changes([(job_id, job)])
+        self._notify_changes(changes)
+
+    def add_many(self, jobs):
+        """
+        Add the jobs that are not registered yet, under one lock so they reach the
+        store in the same flush. Returns the set of job_ids added.
+        """
+        added = set()
+        with self.lock:
+            for job in jobs:
+                job_id = job.get("job_id")
+                if job_id in self.jobs:
+                    continue
+                job = copy.deepcopy(job)
+                self.jobs[job_id] = job
+                self._index(job)
+                self._sort(job)
+                self._touch(job_id)
+                self._dirty[job_id] = "put"
+                added.add(job_id)
+            if added:
+                self.version += 1
+            changes = self._changes((job_id, self.jobs[job_id]) for job_id in added)
+        self._notify_changes(changes)
+        return added
+
+    def remove(self, job_id):
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+            if job is not None:
+                self._unindex(job)
+                self._unsort(job)
+                self._touch(job_id, removed=True)
+                self.version += 1
+            self._expiring.pop(job_id, None)
+            self._dirty[job_id] = "delete"
+            changes = self._changes([(job_id, None)]) if job is not None else []
+        self._notify_changes(changes)
+
+    def retire(self, job_id, delay):
+        """
+        Keep a finished job readable for delay seconds, then remove it.
+        """
+        if delay <= 0:
+            self.remove(job_id)
+            return
+        self.update(job_id, {"expires_at": time.time() + delay})
+
+    def update(self, job_id, fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            changed = any(field not in VOLATILE_FIELDS and job.get(field, _MISSING) != value
+                          for field, value in fields.items())
+            self._unindex(job)
+            resort = "registered_at" in fields or "job_name" in fields
+            if resort:
+                self._unsort(job)
+            job.update(copy.deepcopy(fields))
+            self._index(job)
+            if resort:
+                self._sort(job)
+            changes = []
+            if changed:
+                if self._dirty.get(job_id) != "put":
+                    self._dirty[job_id] = "update"
+                self._touch(job_id)
+                changes = self._changes([(job_id, job)])
+        self._notify_changes(changes)
+
+    # ---- persistence ----
+
+    def add_flush_listener(self, callback):
+        """
+        callback(puts, deletes) runs after each successful flush.
+        """
+        self._flush_listeners.append(callback)
+
+    def flush(self):
+        """
+        Write all dirty entries to the store in one batch.
+        """
+        with self._io_lock:
+            with self.lock:
+                if not self._dirty:
+                    return
+                dirty, self._dirty = self._dirty, {}
+                puts, updates, deletes = [], [], []
+                for job_id, op in dirty.items():
+                    if op == "delete":
+                        deletes.append(job_id)
+                    elif job_id in self.jobs:
+                        (puts if op == "put" else updates).append(copy.deepcopy(self.jobs[job_id]))
+            try:
+                with metrics.STORE_SECONDS.time(operation="write"):
+                    self.store.write_batch(puts, updates, deletes)
+            except Exception:
+                with self.lock:
+                    # Keep newer changes made while we were writing.
+                    for job_id, op in dirty.items():
+                        self._dirty.setdefault(job_id, op)
+                raise
+        for callback in self._flush_listeners:
+            callback(puts, deletes)
+
+    def add_change_listener(self, callback):
+        """
+        callback(job_id, job) runs after a job is added or changed (a shallow copy
+        of the job) or removed (None), in the thread that made the change.
+        """
+        self._change_listeners.append(callback)
+
+    def expire(self, now=None):
+        """
+        Remove retired jobs whose expires_at has passed.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            expired = [job_id for job_id, expires_at in self._expiring.items() if expires_at <= now]
+        for job_id in expired:
+            self.remove(job_id)
+        return len(expired)
+
+    def sync(self):
+        """
+        Reload from the store if another process changed it since the last sync.
+        Local changes that have not been flushed yet are kept on top.
+        """
+        with self._io_lock:
+            self._last_sync = time.time()
+            token = self.store.change_token()
+            if token == self._store_token:
+                return False
+            with metrics.STORE_SECONDS.time(operation="sync"):
+                changes = self.store.changes_since(self._store_cursor)
+            if changes is None:
+                self._reload(token)
+            else:
+                self._patch(token, *changes)
+            return True
+
+    def _patch(self, token, stored, deleted, cursor):
+        """
+        Apply the jobs changed and deleted by another process. Local changes
+        that have not been flushed yet win, as in _reload().
+        """
+        with self.lock:
+            applied = []
+            for job_id in deleted:
+                op = self._dirty.get(job_id)
+                if op == "put":
+                    continue
+                if op == "update":
+                    # Removed by the other process; do not bring it back.
+                    del self._dirty[job_id]
+                job = self.jobs.pop(job_id, None)
+                if job is None:
+                    continue
+                self._unindex(job)
+                self._unsort(job)
+                self._expiring.pop(job_id, None)
+                self._touch(job_id, removed=True)
+                self.version += 1
+                applied.append((job_id, None))
+            for job in stored:
+                job_id = job.get("job_id")
+                if job_id in self._dirty:
+                    continue
+                old = self.jobs.get(job_id)
+                if old is None:
+                    self.version += 1
+                else:
+                    self._unindex(old)
+                    self._unsort(old)
+                    self._expiring.pop(job_id, None)
+                self.jobs[job_id] = job
+                self._index(job)
+                self._sort(job)
+                if _differs(old, job):
+                    self._touch(job_id)
+                    applied.append((job_id, job))
+            self._store_token = token
+            self._store_cursor = cursor
+            changes = self._changes(applied)
+        self._notify_changes(changes)
+
+    def _reload(self, token):
+        # Read the cursor first: a commit in between is applied again by the next sync, not lost.
+        cursor = self.store.change_cursor()
+        with metrics.STORE_SECONDS.time(operation="load"):
+            stored = self.store.load_all()
+        with self.lock:
+            local = self.jobs
+            jobs = {}
+            for job in stored:
+                job_id = job.get("job_id")
+                op = self._dirty.get(job_id)
+                if op == "delete":
+                    continue
+                jobs[job_id] = local[job_id] if op in ("put", "update") and job_id in local else job
+            for job_id, op in list(self._dirty.items()):
+                if op == "put" and job_id in local:
+                    jobs[job_id] = local[job_id]
+                elif op == "update" and job_id not in jobs:
+                    # Removed by the other process; do not bring it back.
+                    del self._dirty[job_id]
+            if jobs.keys() != local.keys():
+                self.version += 1
+            changed = [(job_id, job) for job_id, job in jobs.items() if _differs(local.get(job_id), job)]
+            removed = [(job_id, None) for job_id in local if job_id not in jobs]
+            for job_id, job in changed + removed:
+                self._touch(job_id, removed=job is None)
+            changes = self._changes(changed + removed)
+            self.jobs = jobs
+            self.indexes = {field: {} for field in INDEXED_FIELDS}
+            self._expiring = {}
+            for job in jobs.values():
+                self._index(job)
+            self.order = sorted(map(self._order_key, jobs.values()))
+            self.names = sorted(map(self._name_key, jobs.values()))
+            self._store_token = token
+            self._store_cursor = cursor
+        self._notify_changes(changes)
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.expire()
+                self.flush()
+                if time.time() - self._last_sync >= self.sync_interval:
+                    self.sync()
+            except Exception as e:
+                logger.error(f"[REGISTRY] Failed to flush jobs: {e}")
+                traceback.print_exc()
+
+    def close(self):
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"[REGISTRY] Failed to flush jobs on shutdown: {e}")
+
+    # ---- revisions ----
+
+    def _touch(self, job_id, removed=False):
+        """
+        Give a changed or removed job the next revision; call with the lock held.
+        """
+        self.revision += 1
+        self.modified_at = time.time()
+        if removed:
+            self._revisions.pop(job_id, None)
+            self._tombstones[job_id] = self.revision
+            self._tombstones.move_to_end(job_id)
+            while len(self._tombstones) > self.revision_history:
+                _, self._tombstone_floor = self._tombstones.popitem(last=False)
+        else:
+            self._revisions[job_id] = (self.revision, self.modified_at)
+            self._revisions.move_to_end(job_id)
+            self._tombstones.pop(job_id, None)
+
+    # ---- change listeners ----
+
+    def _changes(self, jobs):
+        """
+        (job_id, shallow copy or None) pairs to hand to the change listeners; call with the lock held.
+        """
+        if not self._change_listeners:
+            return []
+        return [(job_id, dict(job) if job is not None else None) for job_id, job in jobs]
+
+    def _notify_changes(self, changes):
+        for job_id, job in changes:
+            for callback in self._change_listeners:
+                try:
+                    callback(job_id, job)
+                except Exception as e:
+                    logger.error(f"[REGISTRY] Change listener failed for job {job_id}: {e}")
+
+    # ---- indexes ----
+
+    def _index(self, job):
+        job_id = job.get("job_id")
+        for field in INDEXED_FIELDS:
+            self.indexes[field].setdefault(job.get(field), set()).add(job_id)
+        if job.get("expires_at") is not None:
+            self._expiring[job_id] = job["expires_at"]
+
+    def _count_in_range(self, candidates, start_key, high, registered_after, registered_before):
+        if registered_after is None and registered_before is None:
+            return len(candidates)
+        return sum(1 for job_id in candidates if start_key <= self._order_key(self.jobs[job_id]) <= high)
+
+    @staticmethod
+    def _order_key(job):
+        return (float(job.get("registered_at") or 0.0), job.get("job_id"))
+
+    @staticmethod
+    def _name_key(job):
+        return (str(job.get("job_name") or ""), job.get("job_id"))
+
+    @staticmethod
+    def _project(job, fields):
+        if fields is None:
+            return copy.deepcopy(job)
+        return {field: copy.deepcopy(job[field]) for field in fields if field in job}
+
+    def _sort(self, job):
+        bisect.insort(self.order, self._order_key(job))
+        bisect.insort(self.names, self._name_key(job))
+
+    def _unsort(self, job):
+        for keys, key in ((self.order, self._order_key(job)), (self.names, self._name_key(job))):
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def _unindex(self, job):
+        job_id = job.get("job_id")
+        for field in INDEXED_FIELDS:
+            job_ids = self.indexes[field].get(job.get(field))
+            if job_ids is not None:
+                job_ids.discard(job_id)
+                if not job_ids:
+                    del self.indexes[field][job.get(field)]
+
+
+_MISSING = object()
+
+def _differs(old, new):
+    """
+    True if two versions of a job differ in more than VOLATILE_FIELDS.
+    """
+    if old is None or new is None:
+        return old is not new
+    if old is new:
+        return False
+    return any(old.get(key, _MISSING) != new.get(key, _MISSING)
+               for key in old.keys() | new.keys() if key not in VOLATILE_FIELDS)
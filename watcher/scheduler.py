@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import random
+from watcher.config_loader import config
+
+# Idle states are polled at check_interval * multiplier (capped at max_check_interval).
+IDLE_MULTIPLIERS = {
+    "Suspended": 6,
+    "Pending": 3,
+    "Queued": 2,
+}
+
+# Weight of the newest sample in the chunk completion rate average.
+RATE_SMOOTHING = 0.5
+
+class PollScheduler:
+    """
+    Decides how long to wait before polling a job again.
+
+    Idle jobs (Suspended/Pending/Queued) are polled less often. Rendering jobs are
+    polled at check_interval until their estimated time to completion, based on
+    the observed chunk completion rate, gets close; then the interval shrinks
+    towards min_check_interval so the completion is seen sooner. Every interval
+    gets +/- jitter so jobs registered together do not poll in lockstep.
+    """
+    def __init__(self, base_interval=None, min_interval=None, max_interval=None, jitter=None):
+        self.base_interval = base_interval or config.check_interval
+        self.min_interval = min(min_interval or config.min_check_interval, self.base_interval)
+        self.max_interval = max(max_interval or config.max_check_interval, self.base_interval)
+        self.jitter = config.poll_jitter if jitter is None else jitter
+
+    def next_interval(self, status, job_details, progress):
+        """
+        progress: the job's ProgressTracker, already updated with job_details.
+        """
+        multiplier = IDLE_MULTIPLIERS.get(status)
+        if multiplier:
+            interval = min(self.base_interval * multiplier, self.max_interval)
+        else:
+            interval = self.base_interval
+            eta = progress.eta(job_details)
+            if eta is not None:
+                interval = max(self.min_interval, min(interval, eta / 2))
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class ProgressTracker:
+    """
+    Smoothed chunk completion rate (chunks/sec) of one job across polls.
+    """
+    def __init__(self):
+        self.last_time = None
+        self.last_completed = None
+        self.rate = None
+
+    def update(self, job_details, now):
+        completed = job_details.get("progress", 0)
+        if self.last_time is not None and now > self.last_time:
+            if completed < self.last_completed:
+                # Tasks were requeued; start measuring again.
+                self.rate = None
+            else:
+                sample = (completed - self.last_completed) / (now - self.last_time)
+                self.rate = sample if self.rate is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * self.rate
+        self.last_time = now
+        self.last_completed = completed
+
+    def eta(self, job_details):
+        """
+        Estimated seconds until all chunks are done, or None if unknown.
+        """
+        remaining = job_details.get("total_chunks", 0) - job_details.get("progress", 0)
+        if not self.rate or remaining <= 0:
+            return None
+        return remaining / self.rate
@@ -1,21 +1,86 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import glob
+import threading
+from watcher.config_loader import config
 
-def get_latest_rv_path():
-    base_dir = r"C:\Program Files\ShotGrid"
-    if not os.path.exists(base_dir):
-        return None
+# Player executables searched for by name. Entries under players: in settings.yaml
+# override these or add new ones.
+DEFAULT_PLAYERS = {
+    "rv": {
+        "roots": [r"C:\Program Files\ShotGrid"],
+        "pattern": os.path.join("RV-*", "bin", "rv.exe"),
+    },
+    "djv": {
+        "roots": [r"C:\Program Files"],
+        "pattern": os.path.join("DJV*", "bin", "djv.exe"),
+    },
+}
+# Version numbers in the matched path decide which install is newest.
+VERSION_PATTERN = re.compile(r"(\d+(?:\.\d+)*)")
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+class PlayerResolver:
+    """
+    Finds the newest install of one player (pattern globbed under each root)
+    and caches it. The search runs again only when a root directory's mtime
+    changes (an install was added or removed) or the cached executable is gone,
+    so a lookup normally costs one stat per root.
+    """
+    def __init__(self, roots, pattern):
+        self.roots = [os.path.expanduser(root) for root in roots]
+        self.pattern = pattern
+        self.lock = threading.Lock()
+        self._mtimes = None
+        self._path = None
 
-    rv_paths = glob.glob(os.path.join(base_dir, "RV-*", "bin", "rv.exe"))
-    if not rv_paths:
+    def resolve(self):
+        mtimes = tuple(_mtime(root) for root in self.roots)
+        with self.lock:
+            if mtimes != self._mtimes or (self._path and not os.path.exists(self._path)):
+                self._path = self._search()
+                self._mtimes = mtimes
+            return self._path
+
+    def _search(self):
+        candidates = []
+        for root in self.roots:
+            if os.path.isdir(root):
+                for path in glob.glob(os.path.join(root, self.pattern)):
+                    candidates.append((_version(os.path.relpath(path, root)), path))
+        if not candidates:
+            return None
+        return max(candidates)[1]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
         return None
 
-    def extract_version(path):
-        import re
-        match = re.search(r"RV-(\d+(?:\.\d+)*)", path)
-        return tuple(map(int, match.group(1).split("."))) if match else (0,)
+def _version(path):
+    match = VERSION_PATTERN.search(path)
+    return tuple(map(int, match.group(1).split("."))) if match else (0,)
 
-    rv_paths.sort(key=extract_version, reverse=True)
-    return rv_paths[0] if rv_paths else None
+def get_player_path(name):
+    """
+    Path of the newest install of the named player (see DEFAULT_PLAYERS), or None.
+    """
+    with _resolvers_lock:
+        resolver = _resolvers.get(name)
+        if resolver is None:
+            settings = dict(DEFAULT_PLAYERS.get(name, {}))
+            settings.update(config.players.get(name) or {})
+            if not settings.get("pattern"):
+                return None
+            resolver = _resolvers[name] = PlayerResolver(settings.get("roots", []), settings["pattern"])
+    return resolver.resolve()
+
+def get_latest_rv_path():
+    return get_player_path("rv")